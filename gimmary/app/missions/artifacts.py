@@ -0,0 +1,268 @@
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from gimmary.app.missions.lod import LOD_LEVELS
+from gimmary.app.missions.storage import acquire, local_file, put_blob, ref_key, release, staging_dir
+from gimmary.app.missions.utils import compress_glb, sha256_file
+from gimmary.database.models import ArtifactStatus, ModelArtifact, ReconstructionJob
+
+# 생성된 모델은 원본 GLB의 SHA-256으로 묶고, 변형(Draco 등)은 생성 시점에 백그라운드 작업으로
+# 한 번만 만듭니다. 파일은 모두 내용 주소 저장소(storage.py)에 두고, 다운로드는 DB에 기록된 파일을
+# 그대로 보내기만 합니다 (요청 경로에서 subprocess 없음).
+# 원본 파일은 그 모델을 쓰는 미션(Mission.model_url)이, 변형 파일은 변형 행이 참조합니다.
+# 저장소 이전에 만든 모델 파일이 있는 디렉터리
+ARTIFACTS_DIR = Path("downloads")
+
+ORIGINAL = "original"
+DRACO = "draco"
+# 다운로드 시 변형을 지정하지 않으면 이 순서로 준비된 것을 보냄
+DOWNLOAD_PREFERENCE = (DRACO, ORIGINAL)
+# 생성 시 원본에서 만들어 둘 변형 → 만드는 함수 (src, dst) -> 로그
+DERIVED_VARIANTS = {
+    DRACO: compress_glb,
+}
+# 미션 응답의 LOD URL 중 원본 메시를 가리키는 이름
+FULL_LOD = "full"
+
+class Download(NamedTuple):
+    path: Path
+    etag: str | None         # 변형 파일의 SHA-256 (예전 파일은 None)
+    immutable: bool          # 이 URL의 내용이 바뀌지 않는지 (변형까지 지정한 해시 이름)
+    name: str                # 받는 쪽에 보여줄 파일 이름 (<해시>.<변형>.glb)
+    internal: str            # 앞단 서버가 파일을 찾을 상대 경로 (저장소 키, 예전 파일은 파일 이름)
+
+
+_MODEL_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?:\.(?P<variant>[a-z]+))?\.glb$")
+
+
+def artifact_filename(content_hash: str, variant: str) -> str:
+    return f"{content_hash}.glb" if variant == ORIGINAL else f"{content_hash}.{variant}.glb"
+
+
+def model_url(content_hash: str, variant: str = ORIGINAL) -> str:
+    """미션/작업에 저장하는 모델 URL. 원본 URL이면 실제로 보낼 변형은 다운로드 시 고릅니다."""
+    return f"/missions/downloads/{artifact_filename(content_hash, variant)}"
+
+
+# ─────────────────────────────────────────────
+# 생성 시점
+# ─────────────────────────────────────────────
+def store_model(
+    session: Session, mesh_path: Path, lods: dict[str, Path] | None = None
+) -> tuple[str, list[ModelArtifact]]:
+    """생성된 .glb를 저장소로 옮기고 원본 변형을 기록합니다.
+
+    lods(LOD 단계 이름 → 줄인 .glb)는 원본 해시 아래 `<해시>.<단계>.glb` 변형으로 함께 기록합니다.
+    (원본 해시, 새로 만들어야 하는 변형의 pending 행 목록)을 반환합니다. 같은 내용의 모델이 이미 있으면
+    파일을 다시 쓰지 않고, 이미 기록된 변형은 다시 만들지 않습니다.
+    """
+    content_hash = sha256_file(mesh_path)
+    _store_file(session, content_hash, ORIGINAL, mesh_path, sha256=content_hash)
+    for name, path in (lods or {}).items():
+        _store_file(session, content_hash, name, path)
+    pending = [a for a in (_claim(session, content_hash, v) for v in DERIVED_VARIANTS) if a is not None]
+    return content_hash, pending
+
+
+def _store_file(session: Session, content_hash: str, variant: str, path: Path, sha256: str | None = None) -> None:
+    """이미 만들어진 변형 파일을 저장소로 옮기고 준비됨으로 기록합니다."""
+    sha256 = sha256 or sha256_file(path)
+    size = path.stat().st_size
+    ref = put_blob(session, path, sha256, ".glb")
+    _claim(
+        session, content_hash, variant,
+        ref=None if variant == ORIGINAL else ref,
+        status=ArtifactStatus.READY.value,
+        filename=ref,
+        size=size,
+        sha256=sha256,
+        finished_at=datetime.utcnow(),
+    )
+
+
+def _claim(
+    session: Session, content_hash: str, variant: str, ref: str | None = None, **fields
+) -> ModelArtifact | None:
+    """(content_hash, variant) 행을 새로 만들면 그 행을, 이미 있으면 None을 반환합니다 (유니크 제약으로 한 번만).
+
+    ref가 있으면 새 행이 그 파일을 참조하는 것으로 같은 트랜잭션에서 셉니다.
+    """
+    exists = session.query(ModelArtifact.id).filter(
+        ModelArtifact.content_hash == content_hash, ModelArtifact.variant == variant
+    ).first()
+    if exists:
+        return None
+    fields.setdefault("status", ArtifactStatus.PENDING.value)
+    artifact = ModelArtifact(content_hash=content_hash, variant=variant, created_at=datetime.utcnow(), **fields)
+    session.add(artifact)
+    acquire(session, ref)
+    try:
+        session.commit()
+    except IntegrityError:
+        # 다른 작업이 같은 모델을 동시에 저장함
+        session.rollback()
+        return None
+    return artifact
+
+
+def build_variant(session: Session, artifact_id: int) -> str:
+    """pending 변형을 원본에서 만들고 기록합니다. 이미 준비됐으면 아무 것도 하지 않습니다. 로그를 반환합니다."""
+    artifact = session.get(ModelArtifact, artifact_id)
+    if artifact is None:
+        raise ValueError(f"model artifact {artifact_id} not found")
+    if artifact.status == ArtifactStatus.READY.value:
+        return f"{artifact.variant} 변형이 이미 있습니다 ({artifact.filename})"
+
+    original = session.query(ModelArtifact).filter(
+        ModelArtifact.content_hash == artifact.content_hash, ModelArtifact.variant == ORIGINAL
+    ).first()
+    # gltf-pipeline은 출력 확장자로 glb/gltf를 정하므로 .glb로 끝나는 임시 이름을 씀
+    tmp = staging_dir() / artifact_filename(artifact.content_hash, artifact.variant)
+    try:
+        if original is None or not original.filename:
+            raise FileNotFoundError(f"original model {artifact.content_hash} not found")
+        output = DERIVED_VARIANTS[artifact.variant](artifact_path(original), tmp)
+        sha256 = sha256_file(tmp)
+        size = tmp.stat().st_size
+        ref = put_blob(session, tmp, sha256, ".glb")
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        artifact.status = ArtifactStatus.FAIL.value
+        artifact.error = str(e)
+        session.commit()
+        raise
+
+    artifact.status = ArtifactStatus.READY.value
+    artifact.filename = ref
+    artifact.size = size
+    artifact.sha256 = sha256
+    artifact.error = None
+    artifact.finished_at = datetime.utcnow()
+    acquire(session, ref)
+    session.commit()
+    return output
+
+
+def artifact_path(artifact: ModelArtifact) -> Path:
+    """변형 파일의 로컬 경로. 저장소 이전의 행은 downloads/ 아래에서 찾습니다."""
+    if ref_key(artifact.filename):
+        return local_file(artifact.filename)
+    return ARTIFACTS_DIR / artifact.filename
+
+
+# ─────────────────────────────────────────────
+# 참조 수
+# ─────────────────────────────────────────────
+def _original_ref(session: Session, url: str | None) -> str | None:
+    match = _MODEL_NAME.match(url.rsplit("/", 1)[-1]) if url else None
+    if match is None:
+        return None
+    original = session.query(ModelArtifact.filename).filter(
+        ModelArtifact.content_hash == match["hash"], ModelArtifact.variant == ORIGINAL
+    ).first()
+    return original.filename if original else None
+
+
+def retain_model(session: Session, url: str | None) -> None:
+    """미션이 url의 모델을 쓰기 시작함 (원본 파일 참조 수 +1, 커밋은 호출 측에서)."""
+    acquire(session, _original_ref(session, url))
+
+
+def release_model(session: Session, url: str | None) -> None:
+    """미션이 url의 모델을 더 이상 쓰지 않음 (원본 파일 참조 수 -1, 커밋은 호출 측에서)."""
+    release(session, _original_ref(session, url))
+
+
+def forget_model(session: Session, ref: str) -> None:
+    """GC가 원본 파일을 지우기 전에 그 모델의 변형 행을 지우고 변형 파일 참조를 놓습니다.
+
+    원본이 아닌 파일이면 아무 것도 하지 않습니다 (collect_garbage의 on_delete).
+    """
+    original = session.query(ModelArtifact).filter(
+        ModelArtifact.variant == ORIGINAL, ModelArtifact.filename == ref
+    ).first()
+    if original is None:
+        return
+    artifacts = session.query(ModelArtifact).filter(ModelArtifact.content_hash == original.content_hash).all()
+    ids = [a.id for a in artifacts]
+    session.query(ReconstructionJob).filter(ReconstructionJob.artifact_id.in_(ids)).update(
+        {"artifact_id": None}, synchronize_session=False
+    )
+    for artifact in artifacts:
+        if artifact.variant != ORIGINAL and artifact.status == ArtifactStatus.READY.value:
+            release(session, artifact.filename)
+        session.delete(artifact)
+
+
+# ─────────────────────────────────────────────
+# 다운로드 시점
+# ─────────────────────────────────────────────
+def lod_urls(session: Session, url: str | None) -> dict[str, str]:
+    """미션 model_url에 대한 LOD 이름 → URL. 원본은 "full", 준비된 LOD 단계는 `<해시>.<단계>.glb`.
+
+    내용 해시 이름이 아닌 예전 모델은 원본만 반환합니다.
+    """
+    if not url:
+        return {}
+    match = _MODEL_NAME.match(url.rsplit("/", 1)[-1])
+    if match is None or match["variant"]:
+        return {FULL_LOD: url}
+    levels = [level.name for level in LOD_LEVELS]
+    ready = session.query(ModelArtifact.variant).filter(
+        ModelArtifact.content_hash == match["hash"],
+        ModelArtifact.variant.in_(levels),
+        ModelArtifact.status == ArtifactStatus.READY.value,
+    )
+    names = {row.variant for row in ready}
+    # 작은 단계부터 (휴대폰은 앞에서부터 받아 보여줌)
+    urls = {name: model_url(match["hash"], name) for name in reversed(levels) if name in names}
+    urls[FULL_LOD] = url
+    return urls
+
+
+def resolve_download(session: Session, filename: str, variant: str | None = None) -> Download | None:
+    """다운로드할 파일. 없으면 None.
+
+    `<해시>.glb`는 variant(없으면 DOWNLOAD_PREFERENCE 순서)로 준비된 변형을 보내므로 Draco가 준비되면
+    내용이 바뀔 수 있고, `<해시>.<변형>.glb`는 그 변형만 보내므로 바뀌지 않습니다.
+    그 외 이름은 예전에 저장된 파일을 그대로 찾습니다.
+    """
+    if Path(filename).name != filename:
+        return None
+    match = _MODEL_NAME.match(filename)
+    if match is None:
+        path = ARTIFACTS_DIR / filename
+        return Download(path, None, False, filename, filename) if path.is_file() else None
+
+    if match["variant"]:
+        wanted = [match["variant"]]
+    elif variant:
+        wanted = [variant]
+    else:
+        wanted = list(DOWNLOAD_PREFERENCE)
+    ready = {
+        a.variant: a
+        for a in session.query(ModelArtifact).filter(
+            ModelArtifact.content_hash == match["hash"],
+            ModelArtifact.status == ArtifactStatus.READY.value,
+        )
+    }
+    for name in wanted:
+        if name not in ready:
+            continue
+        try:
+            path = artifact_path(ready[name])
+        except FileNotFoundError:
+            continue
+        if path.is_file():
+            artifact = ready[name]
+            return Download(
+                path, artifact.sha256, bool(match["variant"]),
+                artifact_filename(match["hash"], name), ref_key(artifact.filename) or artifact.filename,
+            )
+    return None
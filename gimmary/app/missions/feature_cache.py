@@ -0,0 +1,138 @@
+import io
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def pair_key(hash_a: str, hash_b: str) -> str:
+    """순서와 무관한 이미지 쌍 키."""
+    a, b = sorted((hash_a, hash_b))
+    return f"{a}:{b}"
+
+
+class FeatureCache:
+    """이미지 내용 해시(SHA-256) 기반의 임베딩/매칭 결과 디스크 캐시.
+
+    sqlite 파일 하나에 저장하며, 전체 크기가 `max_bytes`를 넘으면 가장 오래
+    사용되지 않은 항목부터 지웁니다(LRU). 여러 워커 프로세스가 같은 파일을
+    공유해도 됩니다.
+
+    `namespace`에는 모델/전처리 설정을 넣어 설정이 바뀌면 다른 키를 쓰게 합니다.
+    """
+
+    # 매칭 결과 한 건의 대략적인 행 크기 (키 + 메타데이터)
+    _PAIR_ROW_BYTES = 160
+
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " nbytes INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ── 공통 ─────────────────────────────────────
+    def _get_many(self, keys: list[str]) -> dict[str, bytes]:
+        if not keys:
+            return {}
+        conn = self._connect()
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", keys).fetchall()
+        if rows:
+            with conn:
+                conn.execute(
+                    f"UPDATE entries SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                    [time.time(), *(k for k, _ in rows)],
+                )
+        return dict(rows)
+
+    def _put_many(self, items: list[tuple[str, bytes, int]]) -> None:
+        if not items:
+            return
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, nbytes, last_used) VALUES (?, ?, ?, ?)",
+                [(key, value, nbytes, now) for key, value, nbytes in items],
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        conn = self._connect()
+        (total,) = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        with conn:
+            victims = []
+            for key, nbytes in conn.execute("SELECT key, nbytes FROM entries ORDER BY last_used"):
+                victims.append((key,))
+                excess -= nbytes
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    # ── 임베딩 ───────────────────────────────────
+    def get_embeddings(self, namespace: str, hashes: list[str]) -> dict[str, np.ndarray]:
+        prefix = f"emb:{namespace}:"
+        found = self._get_many([prefix + h for h in dict.fromkeys(hashes)])
+        return {key[len(prefix):]: np.frombuffer(value, dtype=np.float32) for key, value in found.items()}
+
+    def put_embeddings(self, namespace: str, embeddings: dict[str, np.ndarray]) -> None:
+        items = []
+        for h, emb in embeddings.items():
+            value = np.ascontiguousarray(emb, dtype=np.float32).reshape(-1).tobytes()
+            items.append((f"emb:{namespace}:{h}", value, len(value)))
+        self._put_many(items)
+
+    # ── 이미지 쌍 매칭 결과 ───────────────────────
+    def get_inliers(self, namespace: str, pairs: list[tuple[str, str]]) -> dict[str, int]:
+        """`pair_key(a, b)` → 인라이어 수."""
+        prefix = f"pair:{namespace}:"
+        found = self._get_many([prefix + pair_key(a, b) for a, b in pairs])
+        return {key[len(prefix):]: int.from_bytes(value, "little") for key, value in found.items()}
+
+    def put_inliers(self, namespace: str, inliers: dict[str, int]) -> None:
+        self._put_many([
+            (f"pair:{namespace}:{key}", int(count).to_bytes(4, "little"), self._PAIR_ROW_BYTES)
+            for key, count in inliers.items()
+        ])
+
+    # ── 배열 묶음 (DUSt3R 페어 예측, 카메라 포즈 등) ──
+    def get_arrays(self, namespace: str, keys: list[str]) -> dict[str, dict[str, np.ndarray]]:
+        prefix = f"arr:{namespace}:"
+        found = self._get_many([prefix + k for k in dict.fromkeys(keys)])
+        result = {}
+        for key, value in found.items():
+            with np.load(io.BytesIO(value)) as data:
+                result[key[len(prefix):]] = {name: data[name] for name in data.files}
+        return result
+
+    def put_arrays(self, namespace: str, items: dict[str, dict[str, np.ndarray]]) -> None:
+        rows = []
+        for key, arrays in items.items():
+            buf = io.BytesIO()
+            np.savez(buf, **arrays)
+            value = buf.getvalue()
+            rows.append((f"arr:{namespace}:{key}", value, len(value)))
+        self._put_many(rows)
@@ -1,126 +1,205 @@
+import gc
+import hashlib
+import os
 import tempfile
+import time
 import warnings
+from contextlib import ExitStack
 from pathlib import Path
-from itertools import combinations
+from typing import Callable
 
 import numpy as np
-import cv2
 import torch
-import gradio as gr
-from PIL import Image
-from PIL.ExifTags import TAGS
-from sklearn.metrics.pairwise import cosine_similarity
 import kornia.feature as KF
 
+from gimmary.app.missions.feature_cache import FeatureCache
+from gimmary.app.missions.ingest import DUST3R_SIZE, LOFTR_SIZE, derive_dust3r
+from gimmary.app.missions.lod import build_lods
+from gimmary.app.missions.quality import DEFAULT_QUALITY, QualityTier, get_tier
+from gimmary.app.missions.residency import RESIDENCY, current_rss
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from gimmary.app.missions.storage import staging_dir
+from gimmary.app.missions.verification import (
+    ImageSet,
+    load_embeddings,
+    match_against_accepted,
+    similarity_matrix,
+    verify_same_subject,
+)
+from gimmary.app.missions.verify_backends import export_onnx, get_verify_backend
+
 warnings.filterwarnings("ignore")
 
 # ─────────────────────────────────────────────
 # 설정
 # ─────────────────────────────────────────────
-DINO_THRESHOLD = 0.5
-LOFTR_INLIER_THRESHOLD = 10
+# 동일 피사체 검증 설정(임계값, 배치 크기, 캐시 네임스페이스)은 verification.py에 있습니다.
+# DUSt3R 입력 해상도·페어 그래프·정렬 반복·신뢰도 임계값은 품질 단계(quality.py)마다 정해집니다.
+# 512px 페어 하나를 추론할 때 필요한 대략적인 메모리
+DUST3R_PAIR_MEMORY_MB = MISSION_SETTINGS.DUST3R_PAIR_MEMORY_MB
+DUST3R_MAX_BATCH_SIZE = MISSION_SETTINGS.DUST3R_MAX_BATCH_SIZE
+# 전역 정렬 (mini_dust3r 기본값: lr 0.01, cosine 스케줄, 최소 lr 1e-6)
+ALIGN_LR = 0.01
+ALIGN_LR_MIN = 1e-6
 DEVICE = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
 
-# 모델은 앱 시작 시 한 번만 로드
-_dino_model = None
-_loftr_model = None
-_dust3r_model = None
-
-
-def get_dino():
-    global _dino_model
-    if _dino_model is None:
-        _dino_model = torch.hub.load("facebookresearch/dinov2", "dinov2_vitb14", verbose=False)
-        _dino_model.eval().to(DEVICE)
-    return _dino_model
-
+# 모델 가중치: 네트워크 없이도 뜰 수 있도록 로컬 디렉터리에 캐시 (`--fetch-weights`로 미리 받아둠)
+WEIGHTS_DIR = Path(MISSION_SETTINGS.WEIGHTS_DIR)
+DINO_REPO = "facebookresearch/dinov2"
+DUST3R_REPO = "naver/DUSt3R_ViTLarge_BaseDecoder_512_dpt"
+# kornia가 torch.hub.load_state_dict_from_url로 받는 LoFTR outdoor 체크포인트 (hub 디렉터리의 checkpoints/ 아래)
+LOFTR_CHECKPOINT = "loftr_outdoor.ckpt"
+torch.hub.set_dir(str(WEIGHTS_DIR / "torch"))
+
+# 추론 프로파일: fp32(기본) / bf16(autocast) / int8(Linear 동적 양자화, CPU 전용)
+INFERENCE_PROFILE = MISSION_SETTINGS.INFERENCE_PROFILE
+INFERENCE_PROFILES = ("fp32", "bf16", "int8")
+if INFERENCE_PROFILE not in INFERENCE_PROFILES:
+    raise ValueError(f"unknown inference profile {INFERENCE_PROFILE!r} (expected one of {INFERENCE_PROFILES})")
+
+# torch 백엔드의 특징 캐시 네임스페이스 태그: 프로파일마다 결과가 달라 캐시를 분리
+_PROFILE_SUFFIX = "" if INFERENCE_PROFILE == "fp32" else f"/{INFERENCE_PROFILE}"
+# DUSt3R 페어 예측 캐시 네임스페이스 (입력 해상도별), 카메라 포즈 네임스페이스 (warm start가 다른 프로파일의 포즈를 쓰지 않도록 분리)
+DUST3R_PAIR_NAMESPACE = "dust3r_vitl_512dpt@{size}" + _PROFILE_SUFFIX
+DUST3R_POSE_NAMESPACE = "dust3r_pose" + _PROFILE_SUFFIX
+# 포즈 warm start에 필요한 최소 공통 사진 수 (유사 변환 추정)
+WARM_START_MIN_VIEWS = 3
+
+# 모델은 RESIDENCY가 처음 사용할 때 올리고, 설정에 따라 유휴/메모리 부족 시 내립니다
+_dust3r_cache = None
+
+
+def apply_inference_profile(model, channels_last: bool = False, compile_model: bool = False):
+    """INFERENCE_PROFILE에 맞게 모델을 변환합니다 (양자화 → channels-last → torch.compile 순)."""
+    if INFERENCE_PROFILE == "int8":
+        if DEVICE == "cpu":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            warnings.warn(f"int8 dynamic quantization is CPU-only; running fp32 on {DEVICE}")
+    if channels_last and INFERENCE_PROFILE != "fp32":
+        model = model.to(memory_format=torch.channels_last)
+    if compile_model and MISSION_SETTINGS.INFERENCE_COMPILE:
+        model = torch.compile(model)
+    return model
+
+
+def inference_autocast():
+    """bf16 프로파일일 때 autocast 컨텍스트 (그 외에는 아무 것도 하지 않음)."""
+    return torch.autocast(
+        device_type="cuda" if DEVICE == "cuda" else "cpu",
+        dtype=torch.bfloat16,
+        enabled=INFERENCE_PROFILE == "bf16",
+    )
+
+
+def inference_context() -> ExitStack:
+    """forward 전용 구간: inference_mode + 프로파일 autocast.
+
+    결과를 다시 autograd에 넣는 DUSt3R 추론에는 쓰지 않습니다 (inference 텐서는 backward에 저장 불가).
+    """
+    stack = ExitStack()
+    stack.enter_context(torch.inference_mode())
+    stack.enter_context(inference_autocast())
+    return stack
 
-def get_loftr():
-    global _loftr_model
-    if _loftr_model is None:
-        _loftr_model = KF.LoFTR(pretrained="outdoor")
-        _loftr_model.eval().to(DEVICE)
-    return _loftr_model
 
+def _load_dino():
+    # 이미 받아둔 hub 저장소가 있으면 GitHub에 접속하지 않고 로컬 소스로 로드
+    local_repo = Path(torch.hub.get_dir()) / "facebookresearch_dinov2_main"
+    if local_repo.exists():
+        model = torch.hub.load(str(local_repo), "dinov2_vitb14", source="local", verbose=False)
+    elif MISSION_SETTINGS.OFFLINE:
+        raise RuntimeError(f"DINOv2 weights not found in {local_repo} (offline mode)")
+    else:
+        model = torch.hub.load(DINO_REPO, "dinov2_vitb14", verbose=False)
+    return apply_inference_profile(model.eval().to(DEVICE), channels_last=True, compile_model=True)
 
-def get_dust3r():
-    global _dust3r_model
-    if _dust3r_model is None:
-        from mini_dust3r.model import AsymmetricCroCo3DStereo
-        _dust3r_model = AsymmetricCroCo3DStereo.from_pretrained(
-            "naver/DUSt3R_ViTLarge_BaseDecoder_512_dpt"
-        )
-        _dust3r_model = _dust3r_model.to(DEVICE)
-    return _dust3r_model
 
+def _load_loftr():
+    # 체크포인트가 없으면 kornia가 내려받으려 하므로 오프라인이면 미리 실패
+    checkpoint = Path(torch.hub.get_dir()) / "checkpoints" / LOFTR_CHECKPOINT
+    if MISSION_SETTINGS.OFFLINE and not checkpoint.exists():
+        raise RuntimeError(f"LoFTR weights not found in {checkpoint} (offline mode)")
+    model = KF.LoFTR(pretrained="outdoor")
+    # 매칭 수에 따라 출력 크기가 달라져 그래프가 끊기므로 torch.compile은 적용하지 않음
+    return apply_inference_profile(model.eval().to(DEVICE), channels_last=True)
 
-# ─────────────────────────────────────────────
-# 동일 피사체 검증 (verify_same_subject.py 기반)
-# ─────────────────────────────────────────────
-def extract_embedding(model, image_path: Path) -> np.ndarray:
-    img = Image.open(image_path).convert("RGB").resize((224, 224))
-    tensor = torch.tensor(np.array(img) / 255.0, dtype=torch.float32)
-    tensor = tensor.permute(2, 0, 1).unsqueeze(0)
-    mean = torch.tensor([0.485, 0.456, 0.406]).view(1, 3, 1, 1)
-    std  = torch.tensor([0.229, 0.224, 0.225]).view(1, 3, 1, 1)
-    tensor = (tensor - mean) / std
-    with torch.no_grad():
-        emb = model(tensor.to(DEVICE))
-    return emb.cpu().numpy()
-
-
-def count_loftr_inliers(matcher, path_a: Path, path_b: Path) -> int:
-    def load_gray(p, size=(640, 480)):
-        img = cv2.imread(str(p), cv2.IMREAD_GRAYSCALE)
-        img = cv2.resize(img, size)
-        return torch.tensor(img / 255.0, dtype=torch.float32)[None, None].to(DEVICE)
-
-    img_a = load_gray(path_a)
-    img_b = load_gray(path_b)
-    with torch.no_grad():
-        out = matcher({"image0": img_a, "image1": img_b})
-    kp_a = out["keypoints0"].cpu().numpy()
-    kp_b = out["keypoints1"].cpu().numpy()
-    if len(kp_a) < 4:
-        return 0
-    _, mask = cv2.findHomography(kp_a, kp_b, cv2.RANSAC, 5.0)
-    return int(mask.sum()) if mask is not None else 0
 
+def _load_dust3r():
+    from mini_dust3r.model import AsymmetricCroCo3DStereo
+    model = AsymmetricCroCo3DStereo.from_pretrained(
+        DUST3R_REPO,
+        cache_dir=str(WEIGHTS_DIR / "huggingface"),
+        local_files_only=MISSION_SETTINGS.OFFLINE,
+    )
+    return apply_inference_profile(model.eval().to(DEVICE), compile_model=True)
 
-def verify_same_subject(paths: list[Path]) -> tuple[bool, str]:
-    dino = get_dino()
-    loftr = get_loftr()
 
-    embeddings = [extract_embedding(dino, p) for p in paths]
+RESIDENCY.register("dino", _load_dino)
+RESIDENCY.register("loftr", _load_loftr)
+RESIDENCY.register("dust3r", _load_dust3r)
 
-    pairs_to_check = []
-    log_lines = []
-    for i, j in combinations(range(len(paths)), 2):
-        sim = cosine_similarity(embeddings[i], embeddings[j])[0][0]
-        if sim >= DINO_THRESHOLD:
-            pairs_to_check.append((i, j))
-        log_lines.append(f"{paths[i].name} ↔ {paths[j].name}: DINOv2={sim:.3f}")
 
-    parent = list(range(len(paths)))
+def get_dino():
+    return RESIDENCY.get("dino")
 
-    def find(x):
-        while parent[x] != x:
-            parent[x] = parent[parent[x]]
-            x = parent[x]
-        return x
 
-    def union(x, y):
-        parent[find(x)] = find(y)
+def get_loftr():
+    return RESIDENCY.get("loftr")
 
-    for i, j in pairs_to_check:
-        inliers = count_loftr_inliers(loftr, paths[i], paths[j])
-        log_lines.append(f"  └ LoFTR inliers={inliers}")
-        if inliers >= LOFTR_INLIER_THRESHOLD:
-            union(i, j)
 
-    roots = {find(i) for i in range(len(paths))}
-    same = len(roots) == 1
-    return same, "\n".join(log_lines)
+def get_dust3r():
+    return RESIDENCY.get("dust3r")
+
+
+MODEL_LOADERS = {
+    "dino": get_dino,
+    "loftr": get_loftr,
+    "dust3r": get_dust3r,
+}
+
+
+def model_residency() -> dict[str, bool]:
+    """모델별로 현재 메모리에 올라와 있는지 여부."""
+    return RESIDENCY.resident()
+
+
+def warmup_models(names: list[str]) -> dict[str, float]:
+    """모델을 로드하고 더미 입력으로 한 번 실행해 첫 요청의 지연을 없앱니다. 모델별 소요 시간(초)을 반환합니다."""
+    timings = {}
+    for name in names:
+        started = time.perf_counter()
+        # DINOv2/LoFTR는 검증 백엔드(torch 또는 ONNX Runtime)를 통해 올림
+        if name == "dino":
+            get_verify_backend().embed(np.zeros((1, 3, 224, 224), dtype=np.float32))
+        elif name == "loftr":
+            dummy = np.random.rand(1, 1, LOFTR_SIZE[1], LOFTR_SIZE[0]).astype(np.float32)
+            get_verify_backend().match(dummy, dummy)
+        elif name == "dust3r":
+            from mini_dust3r.inference import inference as dust3r_inference
+            model = get_dust3r()
+            views = [
+                {"img": torch.zeros(1, 3, 384, 512), "true_shape": np.int32([[384, 512]]), "idx": i, "instance": str(i)}
+                for i in range(2)
+            ]
+            with inference_autocast():
+                dust3r_inference([(views[0], views[1])], model, DEVICE, batch_size=1, verbose=False)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def fetch_weights() -> None:
+    """모든 모델 가중치를 WEIGHTS_DIR에 내려받습니다. 배포 이미지 빌드 시 한 번 실행합니다."""
+    for loader in MODEL_LOADERS.values():
+        loader()
+    print(f"weights cached in {WEIGHTS_DIR.resolve()}")
+
+
+def get_dust3r_cache() -> FeatureCache | None:
+    global _dust3r_cache
+    if _dust3r_cache is None and MISSION_SETTINGS.DUST3R_CACHE_ENABLED:
+        _dust3r_cache = FeatureCache(MISSION_SETTINGS.DUST3R_CACHE_PATH, MISSION_SETTINGS.DUST3R_CACHE_MAX_BYTES)
+    return _dust3r_cache
 
 
 # ─────────────────────────────────────────────
@@ -162,71 +241,543 @@ def align_mesh_upright(mesh, world_T_cam_b44: np.ndarray):
     return mesh
 
 
-def reconstruct_3d(paths: list[Path]) -> str:
-    """3D 재구성 후 .glb 파일 경로 반환"""
+def plan_scene_graph(
+    n: int, sims: np.ndarray | None = None, tier: QualityTier = get_tier(DEFAULT_QUALITY)
+) -> tuple[str, list[tuple[int, int]] | None]:
+    """이미지 수와 DINOv2 유사도로 DUSt3R 페어 그래프를 고릅니다.
+
+    Returns:
+        (설명, 페어 목록). 페어 목록이 None이면 설명 문자열을 make_pairs의 scene_graph로 사용합니다.
+    """
+    if n <= tier.complete_max_images:
+        return "complete", None
+    if sims is None:
+        return ("swin-2" if n <= 8 else "logwin-3"), None
+
+    # 유사도 kNN 그래프 + 연결성을 보장하는 최대 신장 트리
+    k = min(tier.knn, n - 1)
+    edges = set()
+    masked = sims.copy()
+    np.fill_diagonal(masked, -np.inf)
+    for i in range(n):
+        for j in np.argsort(-masked[i])[:k]:
+            edges.add((min(i, int(j)), max(i, int(j))))
+
+    in_tree = {0}
+    best = masked[0].copy()
+    best_from = np.zeros(n, dtype=int)
+    while len(in_tree) < n:
+        best[list(in_tree)] = -np.inf
+        j = int(np.argmax(best))
+        i = int(best_from[j])
+        edges.add((min(i, j), max(i, j)))
+        in_tree.add(j)
+        closer = masked[j] > best
+        best[closer] = masked[j][closer]
+        best_from[closer] = j
+    return f"knn-{k}", sorted(edges)
+
+
+def select_views(
+    sims: np.ndarray, k: int, duplicate_similarity: float = MISSION_SETTINGS.NEAR_DUPLICATE_SIMILARITY
+) -> tuple[list[int], dict[int, int]]:
+    """DINOv2 유사도로 최대 k장의 서로 다른 시점을 고릅니다 (k-center greedy).
+
+    가장 대표적인(평균 유사도가 가장 높은) 사진에서 시작해, 이미 고른 사진들과 가장 덜 닮은
+    사진을 하나씩 추가합니다. 남은 사진이 모두 duplicate_similarity 이상으로 닮았으면 k보다 일찍 멈춥니다.
+
+    Returns:
+        (고른 인덱스 목록, 제외한 인덱스 → 가장 닮은 선택 인덱스)
+    """
+    n = len(sims)
+    if n <= 1:
+        return list(range(n)), {}
+    selected = [int(np.argmax(sims.mean(axis=1)))]
+    # 각 사진과 선택된 사진들 사이의 최대 유사도 (= 최소 거리)
+    closest = sims[selected[0]].copy()
+    while len(selected) < k:
+        closest[selected] = np.inf
+        candidate = int(np.argmin(closest))
+        if closest[candidate] >= duplicate_similarity:
+            break
+        selected.append(candidate)
+        closest = np.maximum(closest, sims[candidate])
+    selected.sort()
+    dropped = {i: selected[int(np.argmax(sims[i, selected]))] for i in range(n) if i not in selected}
+    return selected, dropped
+
+
+def run_global_alignment(
+    scene,
+    max_iters: int = MISSION_SETTINGS.ALIGN_MAX_ITERS,
+    min_iters: int = MISSION_SETTINGS.ALIGN_MIN_ITERS,
+    window: int = MISSION_SETTINGS.ALIGN_WINDOW,
+    rel_tol: float = MISSION_SETTINGS.ALIGN_REL_TOL,
+    time_budget: float = MISSION_SETTINGS.ALIGN_TIME_BUDGET,
+    on_init: Callable[[object], None] | None = None,
+) -> tuple[int, float, str]:
+    """MST로 초기화한 뒤 loss가 수렴하면 멈추는 전역 정렬.
+
+    mini_dust3r의 global_alignment_loop와 같은 Adam + cosine 스케줄을 쓰되, 최근 window회 동안
+    loss의 상대 개선이 rel_tol 미만이거나 time_budget(초)을 넘으면 max_iters 전에 종료합니다.
+    on_init은 초기화 직후 최적화 전에 호출됩니다 (예: 이전 포즈로 warm start).
+
+    Returns:
+        (반복 횟수, 최종 loss, 종료 사유 "converged" | "budget" | "max_iters")
+    """
+    # niter=0: 초기화(MST + PnP)만 수행
+    scene.compute_global_alignment(init="mst", niter=0)
+    if on_init is not None:
+        on_init(scene)
+
+    params = [p for p in scene.parameters() if p.requires_grad]
+    if not params:
+        return 0, float("nan"), "converged"
+    optimizer = torch.optim.Adam(params, lr=ALIGN_LR, betas=(0.9, 0.9))
+
+    started = time.perf_counter()
+    history = []
+    reason = "max_iters"
+    for it in range(max_iters):
+        lr = ALIGN_LR_MIN + (ALIGN_LR - ALIGN_LR_MIN) * (1 + np.cos(np.pi * it / max_iters)) / 2
+        for group in optimizer.param_groups:
+            group["lr"] = lr
+        optimizer.zero_grad()
+        loss = scene()
+        loss.backward()
+        optimizer.step()
+        history.append(float(loss))
+
+        if len(history) > max(min_iters, window):
+            previous = history[-1 - window]
+            if (previous - history[-1]) / max(abs(previous), 1e-12) < rel_tol:
+                reason = "converged"
+                break
+        if time_budget and time.perf_counter() - started > time_budget:
+            reason = "budget"
+            break
+    return len(history), history[-1], reason
+
+
+def pick_inference_batch_size(n_pairs: int) -> int:
+    """가용 메모리로 DUSt3R 페어 추론 배치 크기를 정합니다."""
+    if DEVICE == "cuda":
+        available, _ = torch.cuda.mem_get_info()
+    else:
+        try:
+            available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError, AttributeError):
+            return 1
+    # 가용 메모리의 절반만 추론 활성값에 사용
+    fits = int(available * 0.5 // (DUST3R_PAIR_MEMORY_MB * 1024 * 1024))
+    return max(1, min(fits, DUST3R_MAX_BATCH_SIZE, n_pairs))
+
+
+def release_memory() -> None:
+    gc.collect()
+    if DEVICE == "cuda":
+        torch.cuda.empty_cache()
+
+
+class MemoryBudget:
+    """재구성 중 프로세스 RSS 상한 (메모리 제한 모드).
+
+    단계 사이마다 메모리를 정리한 뒤 RSS를 확인하고, 남은 여유로 추론 배치 크기를 정합니다.
+    상한을 넘으면 워커 전체가 OOM으로 죽기 전에 MemoryError로 이 재구성만 실패시킵니다.
+    """
+
+    def __init__(self, limit_mb: int):
+        self.limit = limit_mb * 1024 * 1024
+        self.peak = 0
+
+    def check(self, stage: str) -> int:
+        """상한까지 남은 바이트 수."""
+        release_memory()
+        rss = current_rss()
+        if rss > self.limit and RESIDENCY.unload_idle("memory budget"):
+            # 이 재구성에 쓰지 않는 모델(DINOv2/LoFTR 등)을 먼저 내려 보고 다시 확인
+            rss = current_rss()
+        self.peak = max(self.peak, rss)
+        if rss > self.limit:
+            raise MemoryError(f"{stage}: RSS {rss >> 20}MB exceeds the DUSt3R memory budget ({self.limit >> 20}MB)")
+        return self.limit - rss
+
+    def batch_size(self, n_pairs: int) -> int:
+        fits = int(self.check("inference") // (DUST3R_PAIR_MEMORY_MB * 1024 * 1024))
+        if fits < 1:
+            raise MemoryError(
+                f"inference: not enough headroom for one DUSt3R pair ({DUST3R_PAIR_MEMORY_MB}MB) "
+                f"under the {self.limit >> 20}MB memory budget"
+            )
+        return min(fits, pick_inference_batch_size(n_pairs))
+
+
+class PairSpill:
+    """페어 예측 배열을 디스크에 쓰고 메모리 맵으로 다시 엽니다.
+
+    전역 정렬은 이 배열을 복사 없이 텐서로 감싸 쓰므로, 포인트맵은 RAM 대신 페이지 캐시에 머물고
+    메모리가 부족하면 OS가 내려놓을 수 있습니다.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._count = 0
+
+    def put(self, pred: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        mapped = {}
+        for name, arr in pred.items():
+            path = self.directory / f"{self._count}_{name}.npy"
+            np.save(path, np.ascontiguousarray(arr, dtype=np.float32))
+            mapped[name] = np.load(path, mmap_mode="r+")
+        self._count += 1
+        return mapped
+
+
+def split_pair_predictions(output: dict) -> list[dict[str, np.ndarray]]:
+    """dust3r inference 결과를 페어별 (포인트맵, 신뢰도) fp32 배열로 나눕니다."""
+    pred1, pred2 = output["pred1"], output["pred2"]
+    return [
+        {
+            "pts1": pred1["pts3d"][k].numpy(),
+            "conf1": pred1["conf"][k].numpy(),
+            "pts2": pred2["pts3d_in_other_view"][k].numpy(),
+            "conf2": pred2["conf"][k].numpy(),
+        }
+        for k in range(len(output["view1"]["idx"]))
+    ]
+
+
+def compact_pair_prediction(pred: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """캐시 저장용: 포인트맵은 fp16, 신뢰도는 fp32로 저장합니다."""
+    return {name: arr.astype(np.float16 if name.startswith("pts") else np.float32) for name, arr in pred.items()}
+
+
+def collate_pair_predictions(
+    pairs: list[tuple[dict, dict]],
+    preds: list[dict[str, np.ndarray]],
+    stack: bool = True,
+) -> dict:
+    """페어별 예측을 dust3r inference 결과와 같은 형식으로 묶습니다.
+
+    모양이 같으면 텐서로 쌓고, 다르거나 stack=False면 (메모리 맵을 복사하지 않도록) 텐서 리스트로 둡니다.
+    """
+    def collate(tensors):
+        if stack and all(t.shape == tensors[0].shape for t in tensors):
+            return torch.stack(tensors)
+        return tensors
+
+    def view(side):
+        views = [pair[side] for pair in pairs]
+        return {
+            "img": collate([v["img"][0] for v in views]),
+            "true_shape": collate([torch.from_numpy(np.asarray(v["true_shape"][0])) for v in views]),
+            "idx": [v["idx"] for v in views],
+            "instance": [v["instance"] for v in views],
+        }
+
+    def tensors(key):
+        return collate([torch.from_numpy(np.asarray(p[key], dtype=np.float32)) for p in preds])
+
+    return {
+        "view1": view(0),
+        "view2": view(1),
+        "pred1": {"pts3d": tensors("pts1"), "conf": tensors("conf1")},
+        "pred2": {"pts3d_in_other_view": tensors("pts2"), "conf": tensors("conf2")},
+    }
+
+
+def _similarity_transform(src: np.ndarray, dst: np.ndarray) -> tuple[float, np.ndarray, np.ndarray]:
+    """dst ≈ s · R · src + t 를 만족하는 (s, R, t) (Umeyama)."""
+    mu_src, mu_dst = src.mean(axis=0), dst.mean(axis=0)
+    xs, xd = src - mu_src, dst - mu_dst
+    U, D, Vt = np.linalg.svd(xd.T @ xs / len(src))
+    S = np.eye(3)
+    if np.linalg.det(U) * np.linalg.det(Vt) < 0:
+        S[2, 2] = -1
+    R = U @ S @ Vt
+    s = float(np.trace(np.diag(D) @ S) / max((xs ** 2).sum() / len(src), 1e-12))
+    return s, R, mu_dst - s * R @ mu_src
+
+
+def warm_start_poses(scene, hashes: list[str], cache: FeatureCache) -> int:
+    """이전 재구성에서 저장한 카메라 포즈로 MST 초기 포즈를 덮어씁니다. 적용한 사진 수를 반환합니다.
+
+    이전 포즈는 다른 좌표계에 있으므로, 공통 사진들의 카메라 중심으로 유사 변환을 추정해
+    현재(MST) 좌표계로 옮긴 뒤 적용합니다.
+    """
+    stored = cache.get_arrays(DUST3R_POSE_NAMESPACE, hashes)
+    frames: dict[str, list[int]] = {}
+    for i, h in enumerate(hashes):
+        if h in stored:
+            frames.setdefault(str(stored[h]["frame"]), []).append(i)
+    if not frames:
+        return 0
+    known = max(frames.values(), key=len)
+    if len(known) < WARM_START_MIN_VIEWS:
+        return 0
+
+    current = scene.get_im_poses().detach().cpu().numpy()
+    previous = np.stack([stored[hashes[i]]["pose"] for i in known]).astype(np.float64)
+    s, R, t = _similarity_transform(previous[:, :3, 3], current[known, :3, 3])
+    for i, pose in zip(known, previous):
+        warmed = np.eye(4)
+        warmed[:3, :3] = R @ pose[:3, :3]
+        warmed[:3, 3] = s * R @ pose[:3, 3] + t
+        scene._set_pose(scene.im_poses, i, torch.from_numpy(warmed).float())
+    return len(known)
+
+
+def save_poses(scene, hashes: list[str], cache: FeatureCache) -> None:
+    """정렬된 카메라 포즈를 사진 해시별로 저장합니다. 같은 재구성의 포즈는 같은 frame id를 가집니다."""
+    frame = hashlib.sha256("\n".join(sorted(hashes)).encode()).hexdigest()[:16]
+    poses = scene.get_im_poses().detach().cpu().numpy().astype(np.float32)
+    cache.put_arrays(DUST3R_POSE_NAMESPACE, {h: {"pose": poses[i], "frame": np.array(frame)} for i, h in enumerate(hashes)})
+
+
+def _to_float32(obj):
+    """중첩된 dict/list 안의 부동소수 텐서를 fp32로 바꿉니다 (bf16 추론 결과 정리용)."""
+    if isinstance(obj, torch.Tensor):
+        return obj.float() if obj.is_floating_point() else obj
+    if isinstance(obj, dict):
+        return {k: _to_float32(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_float32(v) for v in obj)
+    return obj
+
+
+def dust3r_views(images: ImageSet, size: int = DUST3R_SIZE) -> list[dict]:
+    """mini_dust3r의 load_images와 같은 입력을 만듭니다.
+
+    리사이즈·크롭은 업로드 시 저장된 배열(없으면 ingest.derive_dust3r)을 쓰고 [-1, 1] 정규화만 여기서 합니다.
+    """
+    views = []
+    for i in range(len(images)):
+        if size == DUST3R_SIZE:
+            arr = images.dust3r_input(i)
+        elif size < DUST3R_SIZE:
+            # 더 작은 입력은 원본 대신 저장된 512px 크롭에서 만듦
+            arr = derive_dust3r(images.dust3r_input(i), size)
+        else:
+            arr = derive_dust3r(images.rgb(i), size)
+        tensor = torch.from_numpy(np.ascontiguousarray(arr)).permute(2, 0, 1).float().div_(255.0).sub_(0.5).div_(0.5)
+        views.append({"img": tensor[None], "true_shape": np.int32([arr.shape[:2]]), "idx": i, "instance": str(i)})
+    return views
+
+
+def reconstruct_3d(
+    images: ImageSet,
+    sims: np.ndarray | None = None,
+    timings: dict[str, float] | None = None,
+    log_lines: list[str] | None = None,
+    tier: QualityTier = get_tier(DEFAULT_QUALITY),
+    lod_paths: dict[str, str] | None = None,
+) -> str:
+    """3D 재구성 후 .glb 파일 경로 반환
+
+    sims가 있으면 유사도 기반 희소 그래프를 쓰고, 세부 단계 소요 시간은 timings에 기록합니다.
+    MESH_LOD_ENABLED면 크기 예산별로 줄인 LOD 메시도 내보내 lod_paths(단계 이름 → .glb 경로)에 기록합니다.
+    입력 해상도·그래프·정렬 반복·신뢰도 임계값은 tier를 따릅니다.
+    DUST3R_MEMORY_BUDGET_MB가 설정되면 페어를 나눠 추론하고 예측을 메모리 맵 파일로 내립니다.
+    """
     import copy
     from mini_dust3r.api.inference import scene_to_results
-    from mini_dust3r.utils.image import load_images
     from mini_dust3r.inference import inference as dust3r_inference
     from mini_dust3r.image_pairs import make_pairs
     from mini_dust3r.cloud_opt import global_aligner, GlobalAlignerMode
 
-    model = get_dust3r()
+    timings = {} if timings is None else timings
+    log_lines = [] if log_lines is None else log_lines
+    lod_paths = {} if lod_paths is None else lod_paths
+    clock = time.perf_counter()
 
-    imgs = load_images(folder_or_list=[str(p) for p in paths], size=512, verbose=True)
+    def lap(stage: str):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = now - clock
+        clock = now
+
+    imgs = dust3r_views(images, size=tier.size)
     if len(imgs) == 1:
         imgs = [imgs[0], copy.deepcopy(imgs[0])]
         imgs[1]["idx"] = 1
-
-    pairs = make_pairs(imgs, scene_graph="complete", prefilter=None, symmetrize=True)
-    output = dust3r_inference(pairs, model, DEVICE, batch_size=1)
-
-    mode = GlobalAlignerMode.PointCloudOptimizer if len(imgs) > 2 else GlobalAlignerMode.PairViewer
-    scene = global_aligner(dust3r_output=output, device=DEVICE, mode=mode)
-
-    if mode == GlobalAlignerMode.PointCloudOptimizer:
-        scene.compute_global_alignment(init="mst", niter=300, schedule="cosine", lr=0.01)
-
-    # int로 명시해서 beartype 버그 우회, min_conf_thr 낮춰 포인트 더 살리기
-    result = scene_to_results(scene, int(3))
-
-    mesh = align_mesh_upright(result.mesh, result.world_T_cam_b44)
-
-    tmp = tempfile.NamedTemporaryFile(suffix=".glb", delete=False)
+    lap("load_images")
+
+    graph, edges = plan_scene_graph(len(imgs), sims, tier)
+    if edges is None:
+        pairs = make_pairs(imgs, scene_graph=graph, prefilter=None, symmetrize=True)
+    else:
+        pairs = [(imgs[i], imgs[j]) for i, j in edges] + [(imgs[j], imgs[i]) for i, j in edges]
+
+    # 이미지 해시 쌍(방향 있음)으로 캐시된 페어 예측은 재사용하고 새 페어만 추론
+    cache = get_dust3r_cache() if len(imgs) == len(images) else None
+    hashes = images.hashes if cache else []
+    namespace = DUST3R_PAIR_NAMESPACE.format(size=tier.size)
+    keys = [f"{hashes[a['idx']]}>{hashes[b['idx']]}" for a, b in pairs] if cache else []
+    preds = cache.get_arrays(namespace, keys) if cache else {}
+    todo = [k for k in range(len(pairs)) if not cache or keys[k] not in preds]
+
+    budget = MemoryBudget(MISSION_SETTINGS.DUST3R_MEMORY_BUDGET_MB) if MISSION_SETTINGS.DUST3R_MEMORY_BUDGET_MB else None
+    # 예외(메모리 예산 초과 포함)가 나도 모델 고정과 예측 스필 디렉터리를 정리
+    with ExitStack() as cleanup:
+        # 추론하는 동안 DUSt3R가 유휴/메모리 부족으로 내려가지 않도록 고정
+        holding = cleanup.enter_context(ExitStack())
+        model = holding.enter_context(RESIDENCY.hold("dust3r")) if todo else None
+        lap("load_model")
+
+        log_lines.append(f"페어 그래프: {graph}, 페어 {len(pairs)}개 (캐시 재사용 {len(pairs) - len(todo)}개)")
+        if not cache and not budget:
+            batch_size = pick_inference_batch_size(len(pairs))
+            log_lines.append(f"  배치 {batch_size}")
+            with inference_autocast():
+                output = dust3r_inference(pairs, model, DEVICE, batch_size=batch_size)
+            # 전역 정렬(최적화)은 fp32로 수행
+            output = _to_float32(output)
+        else:
+            spill = None
+            if budget:
+                spill_root = Path(MISSION_SETTINGS.DUST3R_SPILL_DIR)
+                spill_root.mkdir(parents=True, exist_ok=True)
+                spill = PairSpill(cleanup.enter_context(tempfile.TemporaryDirectory(dir=spill_root)))
+            by_index: dict[int, dict[str, np.ndarray]] = {}
+            done = chunks = 0
+            while done < len(todo):
+                # 메모리 제한 모드에서는 남은 여유만큼의 페어만 한 번에 추론하고 곧바로 디스크로 내림
+                batch_size = budget.batch_size(len(todo) - done) if budget else pick_inference_batch_size(len(todo))
+                chunk = todo[done:done + batch_size] if budget else todo
+                with inference_autocast():
+                    output = _to_float32(dust3r_inference([pairs[k] for k in chunk], model, DEVICE, batch_size=batch_size))
+                computed = split_pair_predictions(output)
+                del output
+                if cache:
+                    cache.put_arrays(namespace, {keys[k]: compact_pair_prediction(p) for k, p in zip(chunk, computed)})
+                for k, pred in zip(chunk, computed):
+                    by_index[k] = spill.put(pred) if spill else pred
+                del computed
+                done += len(chunk)
+                chunks += 1
+                if budget:
+                    budget.check("inference")
+            for k in range(len(pairs)):
+                if k not in by_index:
+                    by_index[k] = spill.put(preds[keys[k]]) if spill else preds[keys[k]]
+            preds.clear()
+            output = collate_pair_predictions(pairs, [by_index[k] for k in range(len(pairs))], stack=not budget)
+            del by_index
+            if budget:
+                log_lines.append(f"  메모리 제한 {budget.limit >> 20}MB: 추론 {chunks}회로 분할, 예측은 메모리 맵으로 보관")
+            elif chunks:
+                log_lines.append(f"  배치 {batch_size}")
+        del model
+        holding.close()
+        lap("inference")
+
+        mode = GlobalAlignerMode.PointCloudOptimizer if len(imgs) > 2 else GlobalAlignerMode.PairViewer
+        scene = global_aligner(dust3r_output=output, device=DEVICE, mode=mode)
+
+        if mode == GlobalAlignerMode.PointCloudOptimizer:
+            warmed = []
+
+            def warm_start(scene):
+                if cache:
+                    warmed.append(warm_start_poses(scene, hashes, cache))
+
+            max_iters = min(tier.align_iters, MISSION_SETTINGS.ALIGN_MAX_ITERS)
+            iterations, loss, reason = run_global_alignment(scene, max_iters=max_iters, on_init=warm_start)
+            log_lines.append(f"전역 정렬: {iterations}/{max_iters}회 반복, 최종 loss {loss:.5f} ({reason})")
+            if warmed and warmed[0]:
+                log_lines.append(f"  이전 카메라 포즈 {warmed[0]}개로 warm start")
+            if cache:
+                save_poses(scene, hashes, cache)
+        lap("alignment")
+
+        if budget:
+            del output
+            budget.check("mesh")
+        # int로 명시해서 beartype 버그 우회 (낮을수록 포인트를 더 살림)
+        result = scene_to_results(scene, int(tier.min_conf_thr))
+        del scene
+
+        mesh = align_mesh_upright(result.mesh, result.world_T_cam_b44)
+        if budget:
+            del result
+            budget.check("mesh")
+            log_lines.append(f"  측정된 최대 RSS {budget.peak >> 20}MB / 제한 {budget.limit >> 20}MB")
+        lap("mesh")
+
+    # 저장소와 같은 파일 시스템의 임시 디렉터리에 써서 저장 시 복사 없이 옮기고, 남으면 워커가 정리
+    tmp = tempfile.NamedTemporaryFile(suffix=".glb", dir=staging_dir(), delete=False)
     mesh.export(tmp.name)
+    lap("export")
+
+    if MISSION_SETTINGS.MESH_LOD_ENABLED:
+        # 휴대폰이 먼저 받을 작은 단계들 (원본은 그대로 full)
+        for name, (lod, size) in build_lods(mesh).items():
+            lod_tmp = tempfile.NamedTemporaryFile(suffix=".glb", dir=staging_dir(), delete=False)
+            lod.export(lod_tmp.name)
+            lod_paths[name] = lod_tmp.name
+            log_lines.append(f"LOD {name}: 면 {len(lod.faces)}개, {size >> 10}KB")
+        lap("lod")
     return tmp.name
 
 
 # ─────────────────────────────────────────────
 # 모듈용 대표 함수 (API)
 # ─────────────────────────────────────────────
-def generate_3d_model(image_paths: list[str | Path], use_verify: bool = True) -> dict:
+def generate_3d_model(
+    image_paths: list[str | Path],
+    use_verify: bool = True,
+    on_stage: Callable[[str], None] | None = None,
+    images: list[np.ndarray] | None = None,
+    hashes: list[str] | None = None,
+    quality: str = DEFAULT_QUALITY,
+) -> dict:
     """
     이미지들을 검증하고 DUSt3R로 3D 모델을 생성합니다.
     
     Args:
         image_paths: 이미지 파일 경로 리스트 (str 또는 Path)
         use_verify: 재구성 전 피사체 동일성 검증 여부
+        on_stage: 단계가 바뀔 때마다 단계 이름("verify", "reconstruct")으로 호출되는 콜백
+        images: image_paths 순서대로 미리 디코딩된 RGB 배열 (없으면 파일에서 디코딩)
+        hashes: image_paths 순서대로 파일 내용의 SHA-256 (없으면 파일에서 계산)
+        quality: 품질 단계 이름 ("preview", "standard", "high")
         
     Returns:
         dict: 처리 결과를 담은 딕셔너리
             - success (bool): 재구성 성공 여부
             - same_subject (bool | None): 동일 피사체 검증 통과 여부 (검증 안 했을 시 None)
             - mesh_path (str | None): 생성된 .glb 파일 경로
+            - lod_paths (dict[str, str]): LOD 단계 이름 → 줄인 .glb 파일 경로 (LOD를 안 만들었으면 비어 있음)
             - log (str): 전체 과정의 텍스트 로그
+            - timings (dict[str, float]): 단계별 소요 시간(초)
+            - quality (str): 사용한 품질 단계
+            - image_count (int): 재구성에 사용한 사진 수
+            - selected / dropped (list[str]): 뷰 선택으로 사용한/제외한 사진 경로
     """
+    tier = get_tier(quality)
     paths = [Path(p) for p in image_paths]
+    image_set = ImageSet(paths, arrays=images, hashes=hashes)
     if len(paths) < 2:
         raise ValueError("이미지를 2장 이상 제공해야 합니다.")
 
-    log_lines = [f"디바이스: {DEVICE}", f"이미지 {len(paths)}장 수신"]
+    log_lines = [f"디바이스: {DEVICE} ({INFERENCE_PROFILE})", f"이미지 {len(paths)}장 수신, 품질 {tier.name}"]
+    timings = {}
     same_subject = None
+    sims = None
     glb_path = None
+    lod_paths = {}
+
+    def enter(stage: str):
+        if on_stage is not None:
+            on_stage(stage)
 
     # 1. 동일 피사체 검증
     if use_verify:
+        enter("verify")
         log_lines.append("\n[ 동일 피사체 검증 중... ]")
-        same_subject, verify_log = verify_same_subject(paths)
+        started = time.perf_counter()
+        same_subject, verify_log, sims = verify_same_subject(image_set)
+        timings["verify"] = time.perf_counter() - started
         log_lines.append(verify_log)
         
         if not same_subject:
@@ -235,25 +786,60 @@ def generate_3d_model(image_paths: list[str | Path], use_verify: bool = True) ->
                 "success": False,
                 "same_subject": False,
                 "mesh_path": None,
-                "log": "\n".join(log_lines)
+                "lod_paths": lod_paths,
+                "log": "\n".join(log_lines),
+                "timings": timings,
+                "quality": tier.name,
+                "image_count": 0,
             }
         log_lines.append("✓ 동일 피사체 확인")
 
     # 2. 3D 재구성
+    enter("reconstruct")
     log_lines.append("\n[ DUSt3R 3D 재구성 중... ]")
+    started = time.perf_counter()
+    recon_set = image_set
+    selected, dropped = list(range(len(paths))), {}
     try:
-        glb_path = reconstruct_3d(paths)
+        if sims is None and len(paths) > 2:
+            # 검증을 건너뛴 경우에도 뷰 선택과 희소 그래프를 위해 (대부분 캐시된) 임베딩을 사용
+            sims = similarity_matrix(load_embeddings(image_set))
+        if sims is not None:
+            # 거의 같은 사진을 빼고 서로 다른 시점 위주로 최대 K장만 재구성에 사용
+            max_views = min(tier.max_images, MISSION_SETTINGS.VIEW_SELECTION_MAX_IMAGES or tier.max_images)
+            selected, dropped = select_views(sims, max_views)
+            log_lines.append(f"뷰 선택: {len(selected)}/{len(paths)}장 사용 (최대 {max_views}장)")
+            log_lines.extend(
+                f"  제외 {image_set.name(i)} (가장 비슷한 사진 {image_set.name(j)}, DINOv2={sims[i, j]:.3f})"
+                for i, j in dropped.items()
+            )
+            if dropped:
+                recon_set = image_set.subset(selected)
+                sims = sims[np.ix_(selected, selected)]
+        glb_path = reconstruct_3d(
+            recon_set, sims=sims, timings=timings, log_lines=log_lines, tier=tier, lod_paths=lod_paths
+        )
         log_lines.append("✓ 3D 재구성 완료")
         success = True
     except Exception as e:
         log_lines.append(f"✗ 재구성 실패: {e}")
         success = False
+    timings["reconstruct"] = time.perf_counter() - started
+
+    log_lines.append("\n[ 단계별 소요 시간 ]")
+    log_lines.extend(f"{stage}: {seconds:.2f}s" for stage, seconds in timings.items())
 
     return {
         "success": success,
         "same_subject": same_subject,
         "mesh_path": glb_path,
-        "log": "\n".join(log_lines)
+        "lod_paths": lod_paths,
+        "log": "\n".join(log_lines),
+        "timings": timings,
+        "quality": tier.name,
+        "image_count": len(recon_set),
+        "selected": [str(paths[i]) for i in selected],
+        "dropped": [str(paths[i]) for i in dropped],
     }
 
 
@@ -270,6 +856,8 @@ def gradio_process(files, use_verify):
 
 
 def create_ui():
+    import gradio as gr
+
     with gr.Blocks(title="3D 피사체 재구성") as demo:
         gr.Markdown("## 다각도 사진 → 3D 재구성\n동일 피사체 여부를 검증한 후 DUSt3R로 3D 모델을 생성합니다.")
 
@@ -300,5 +888,18 @@ def create_ui():
 
 
 if __name__ == "__main__":
-    demo = create_ui()
-    demo.launch(share=False)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetch-weights", action="store_true", help="모델 가중치만 내려받고 종료")
+    parser.add_argument("--export-onnx", action="store_true", help="DINOv2/LoFTR를 ONNX로 내보내고 종료")
+    args = parser.parse_args()
+
+    if args.fetch_weights:
+        fetch_weights()
+    elif args.export_onnx:
+        for path in export_onnx():
+            print(f"exported {path}")
+    else:
+        demo = create_ui()
+        demo.launch(share=False)
\ No newline at end of file
@@ -0,0 +1,180 @@
+import gc
+import importlib
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+from gimmary.app.missions.settings import MISSION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# 추론 프로세스에서 실행할 수 있는 함수 → 정의된 모듈.
+# 검증은 torch 없이 import 되는 모듈에 있어 ONNX 백엔드만 쓰는 프로세스는 torch를 올리지 않습니다.
+INFERENCE_FUNCTIONS = {
+    "generate_3d_model": "gimmary.app.missions.generate_model",
+    "match_against_accepted": "gimmary.app.missions.verification",
+}
+
+
+def resolve(fn_name: str):
+    return getattr(importlib.import_module(INFERENCE_FUNCTIONS[fn_name]), fn_name)
+
+
+# ─────────────────────────────────────────────
+# 추론 프로세스 (자식) 쪽
+# ─────────────────────────────────────────────
+_torch_threads = 0
+_torch_threads_applied = False
+
+
+def _limit_torch_threads() -> None:
+    """torch가 올라와 있으면 이 프로세스의 torch 스레드 수를 예산대로 한 번 정합니다."""
+    global _torch_threads_applied
+    torch = sys.modules.get("torch")
+    if torch is None or _torch_threads_applied or not _torch_threads:
+        return
+    _torch_threads_applied = True
+    torch.set_num_threads(_torch_threads)
+    try:
+        # inter-op 병렬(여러 연산 동시 실행)은 쓰지 않으므로 1개로 두어 예산을 넘지 않게 함
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 이미 inter-op 작업이 시작된 뒤에는 바꿀 수 없음
+        logger.warning("torch inter-op threads already initialized; leaving them unchanged")
+
+
+def _init_process(torch_threads: int, preload: list[str]) -> None:
+    """추론 프로세스마다 한 번: 스레드 예산을 정하고 모델을 올려둡니다."""
+    global _torch_threads
+    _torch_threads = torch_threads
+    # torch가 import 되기 전에 OpenMP 등에도 알려 두고, torch를 올린 뒤 명시적으로 다시 지정.
+    # ONNX 검증 백엔드만 쓰면 torch를 올리지 않고, 재구성 호출로 올라오면 그때 지정
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    if preload or MISSION_SETTINGS.VERIFY_BACKEND != "onnx":
+        importlib.import_module("torch")
+        _limit_torch_threads()
+    if preload:
+        from gimmary.app.missions.generate_model import warmup_models
+        warmup_models(preload)
+
+
+def _run_in_process(fn_name: str, args: tuple, kwargs: dict, shm_name: str | None, layout: list[tuple[tuple, int]]):
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=shm_name) if shm_name else None
+    try:
+        if shm is not None:
+            # 복사 없이 공유 메모리 위의 뷰로 이미지 배열을 넘김
+            kwargs["images"] = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset) for shape, offset in layout]
+        fn = resolve(fn_name)
+        _limit_torch_threads()
+        return fn(*args, **kwargs)
+    finally:
+        if shm is not None:
+            kwargs.pop("images", None)
+            gc.collect()
+            try:
+                shm.close()
+            except BufferError:
+                logger.warning("shared memory %s still referenced; leaving it mapped", shm_name)
+
+
+# ─────────────────────────────────────────────
+# 부모(작업 워커) 쪽
+# ─────────────────────────────────────────────
+class InferencePool:
+    """DINOv2/LoFTR/DUSt3R 모델을 들고 있는 장수(long-lived) 추론 프로세스 풀.
+
+    이미지는 부모에서 한 번 디코딩해 `multiprocessing.shared_memory`로 넘기고,
+    프로세스마다 torch 스레드 수를 따로 정해 API/작업 스레드와 CPU를 나눠 씁니다.
+    프로세스가 죽으면(BrokenProcessPool) 풀을 새로 띄웁니다.
+    """
+
+    def __init__(self, processes: int, torch_threads: int, preload: list[str] | None = None) -> None:
+        self.processes = processes
+        self.torch_threads = torch_threads
+        self.preload = list(preload or [])
+        self._lock = threading.Lock()
+        self._executor = self._spawn()
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process,
+            initargs=(self.torch_threads, self.preload),
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("inference process died; restarting pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._spawn()
+
+    def call(self, fn_name: str, *args, shared_images: list[str] | None = None, **kwargs):
+        """INFERENCE_FUNCTIONS의 `fn_name`을 추론 프로세스에서 실행합니다.
+
+        shared_images가 주어지면 그 경로들을 디코딩해 공유 메모리로 넘기고
+        `images=` 키워드 인자로 전달합니다.
+        """
+        shm, layout = (None, [])
+        if shared_images:
+            shm, layout = _share_images(shared_images)
+        executor = self._executor
+        try:
+            future = executor.submit(_run_in_process, fn_name, args, kwargs, shm.name if shm else None, layout)
+            return future.result()
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _share_images(paths: list[str]) -> tuple[shared_memory.SharedMemory, list[tuple[tuple, int]]]:
+    """이미지들을 디코딩해 공유 메모리 블록 하나에 이어 붙이고 (shape, offset) 목록을 반환합니다."""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    arrays = []
+    for p in paths:
+        with Image.open(p) as img:
+            arrays.append(np.asarray(ImageOps.exif_transpose(img).convert("RGB")))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, sum(a.nbytes for a in arrays)))
+    layout = []
+    offset = 0
+    for arr in arrays:
+        np.ndarray(arr.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[:] = arr
+        layout.append((arr.shape, offset))
+        offset += arr.nbytes
+    return shm, layout
+
+
+_pool: InferencePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_inference_pool() -> InferencePool | None:
+    """MISSION_INFERENCE_PROCESSES > 0이면 공유 풀을, 아니면 None(같은 프로세스에서 실행)을 반환합니다."""
+    global _pool
+    if MISSION_SETTINGS.INFERENCE_PROCESSES <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            threads = MISSION_SETTINGS.INFERENCE_TORCH_THREADS or max(
+                1, (os.cpu_count() or 1) // MISSION_SETTINGS.INFERENCE_PROCESSES
+            )
+            _pool = InferencePool(MISSION_SETTINGS.INFERENCE_PROCESSES, threads, MISSION_SETTINGS.PRELOAD_MODELS)
+    return _pool
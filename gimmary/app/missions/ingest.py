@@ -0,0 +1,284 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy.orm import Session
+
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from gimmary.app.missions.storage import get_blob_store, put_blob, ref_key
+from gimmary.app.missions.utils import sha256_file
+
+# 업로드 시점에 사진을 한 번만 디코딩해 방향을 바로잡고 해상도를 제한한 뒤,
+# 모델별 입력(DINOv2 224px, LoFTR 640x480 그레이, DUSt3R 512px 크롭)을 업로드 옆 .npz로 저장합니다.
+# API 프로세스에서도 호출되므로 PIL/cv2는 함수 안에서만 import 합니다.
+
+# 파생 배열의 형식/전처리가 바뀌면 올려서 기존 .npz를 다시 만들게 합니다.
+INGEST_VERSION = 1
+DINO_SIZE = 224
+LOFTR_SIZE = (640, 480)
+DUST3R_SIZE = 512
+
+# 받아들이는 사진 형식: 파일 앞부분의 시그니처 → 저장할 확장자
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+)
+# RIFF????WEBP
+WEBP_SIGNATURE = (b"RIFF", b"WEBP")
+SNIFF_BYTES = 12
+# multipart 본문에서 파일 외 부분(경계, 파트 헤더, 다른 필드)에 허용하는 여유 바이트
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """업로드가 너무 크거나 지원하는 사진 형식이 아님. status_code는 응답할 HTTP 상태."""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def ingest_path(upload: str | Path) -> Path:
+    """업로드 파일 옆에 저장되는 파생 배열 경로."""
+    upload = Path(upload)
+    return upload.with_name(upload.stem + ".ingest.npz")
+
+
+# ─────────────────────────────────────────────
+# 모델별 입력 파생 (uint8 그대로 저장, 정규화는 사용하는 쪽에서)
+# ─────────────────────────────────────────────
+def derive_dino(rgb: np.ndarray) -> np.ndarray:
+    """(224, 224, 3) uint8."""
+    from PIL import Image
+    return np.asarray(Image.fromarray(rgb).resize((DINO_SIZE, DINO_SIZE)))
+
+
+def derive_loftr(rgb: np.ndarray) -> np.ndarray:
+    """(480, 640) uint8 그레이스케일."""
+    import cv2
+    return cv2.resize(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY), LOFTR_SIZE)
+
+
+def derive_dust3r(rgb: np.ndarray, size: int = DUST3R_SIZE) -> np.ndarray:
+    """mini_dust3r의 load_images와 같은 리사이즈(긴 변 size) → 16배수 중앙 크롭. (H, W, 3) uint8."""
+    from PIL import Image
+
+    img = Image.fromarray(rgb)
+    W, H = img.size
+    S = max(W, H)
+    interp = Image.LANCZOS if S > size else Image.BICUBIC
+    img = img.resize((round(W * size / S), round(H * size / S)), interp)
+    W, H = img.size
+    cx, cy = W // 2, H // 2
+    halfw, halfh = ((2 * cx) // 16) * 8, ((2 * cy) // 16) * 8
+    if W == H:
+        halfh = 3 * halfw // 4
+    return np.asarray(img.crop((cx - halfw, cy - halfh, cx + halfw, cy + halfh)))
+
+
+# ─────────────────────────────────────────────
+# 업로드 수신
+# ─────────────────────────────────────────────
+def sniff_image(header: bytes) -> str | None:
+    """파일 앞부분으로 판별한 사진 확장자. 지원하지 않는 형식이면 None."""
+    for signature, suffix in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return suffix
+    if header[:4] == WEBP_SIGNATURE[0] and header[8:12] == WEBP_SIGNATURE[1]:
+        return ".webp"
+    return None
+
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    out.write(chunk)
+    digest.update(chunk)
+
+
+async def receive_upload(
+    request: Request,
+    field: str,
+    dest_dir: Path,
+    stem: str,
+    max_bytes: int = MISSION_SETTINGS.UPLOAD_MAX_BYTES,
+) -> tuple[Path, str]:
+    """multipart/form-data 요청 본문을 받는 대로 파싱해 field 파일 부분만 dest_dir의 임시 파일에 쓰고,
+    끝나면 `<stem><확장자>`로 옮깁니다.
+
+    본문을 미리 버퍼링하지 않으므로 Content-Length가 크면 읽기 전에, 청크 전송이면 받는 도중에
+    max_bytes를 넘는 순간 거절하고, 파일 앞부분 바이트가 사진 형식이 아니면 그 즉시 거절합니다.
+    확장자는 클라이언트가 보낸 파일 이름이 아니라 앞부분 바이트로 판별합니다. 디스크 쓰기/해시는
+    스레드풀에서 하므로 다른 요청을 막지 않습니다. (최종 경로, SHA-256)을 반환하며, 거절하면
+    임시 파일을 지우고 UploadRejected를 올립니다.
+    """
+    body_limit = max_bytes + MULTIPART_OVERHEAD
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > body_limit:
+        raise UploadRejected(f"Uploaded file exceeds {max_bytes} bytes", 413)
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise UploadRejected("Expected a multipart/form-data body", 400)
+
+    # 파서 콜백은 동기로 불리므로, 대상 파일 부분의 데이터만 모아 두었다가 청크마다 한 번에 씀
+    headers: dict[bytes, bytes] = {}
+    header_field, header_value = bytearray(), bytearray()
+    pending: list[bytes] = []
+    part = {"target": False, "done": False}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        part["target"] = not part["done"] and options.get(b"name") == field.encode()
+        headers.clear()
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if part["target"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end() -> None:
+        if part["target"]:
+            part["target"], part["done"] = False, True
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    tmp = dest_dir / f".{stem}.part"
+    digest = hashlib.sha256()
+    received = size = 0
+    suffix = None
+    head = b""  # 형식을 판별하기 전까지 모아 둔 파일 앞부분
+    try:
+        with open(tmp, "wb") as out:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > body_limit:
+                    raise UploadRejected(f"Uploaded file exceeds {max_bytes} bytes", 413)
+                try:
+                    parser.write(chunk)
+                except MultipartParseError as e:
+                    raise UploadRejected(f"Malformed multipart body: {e}", 400)
+                if not pending:
+                    continue
+                data = b"".join(pending)
+                pending.clear()
+                if suffix is None:
+                    head += data
+                    if len(head) < SNIFF_BYTES and not part["done"]:
+                        continue
+                    suffix = sniff_image(head[:SNIFF_BYTES])
+                    if suffix is None:
+                        raise UploadRejected("Uploaded file is not a supported image (JPEG, PNG, WebP)", 415)
+                    data, head = head, b""
+                size += len(data)
+                if size > max_bytes:
+                    raise UploadRejected(f"Uploaded file exceeds {max_bytes} bytes", 413)
+                await run_in_threadpool(_write_chunk, out, digest, data)
+            parser.finalize()
+        if not part["done"]:
+            raise UploadRejected(f"Missing file field {field!r}", 400)
+        if suffix is None:
+            raise UploadRejected("Uploaded file is empty", 400)
+        dest = dest_dir / f"{stem}{suffix}"
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return dest, digest.hexdigest()
+
+
+# ─────────────────────────────────────────────
+# 업로드 처리
+# ─────────────────────────────────────────────
+def ingest_upload(
+    path: str | Path,
+    max_side: int = MISSION_SETTINGS.INGEST_MAX_SIDE,
+    content_hash: str | None = None,
+) -> str:
+    """업로드된 사진을 정규화하고 파생 배열을 저장한 뒤 최종 파일의 SHA-256을 반환합니다.
+
+    EXIF 방향이 있거나 긴 변이 max_side를 넘으면 바로 세운/줄인 이미지로 파일을 교체합니다.
+    content_hash는 수신하면서 계산한 원본의 해시로, 파일을 교체하지 않았으면 다시 읽지 않고 그대로 씁니다.
+    이미지가 아니면 PIL의 예외(UnidentifiedImageError 등)가 그대로 올라갑니다.
+    """
+    from PIL import Image, ImageOps
+
+    path = Path(path)
+    with Image.open(path) as img:
+        img.load()
+        fmt = img.format
+        orientation = img.getexif().get(0x0112, 1)  # Orientation
+        normalized = ImageOps.exif_transpose(img).convert("RGB")
+
+    if orientation != 1 or max(normalized.size) > max_side:
+        content_hash = None
+        normalized.thumbnail((max_side, max_side), Image.LANCZOS)
+        tmp = path.with_name(path.name + ".tmp")
+        if fmt == "PNG":
+            normalized.save(tmp, format="PNG")
+        else:
+            normalized.save(tmp, format="JPEG", quality=95)
+        os.replace(tmp, path)
+
+    rgb = np.asarray(normalized)
+    tmp = ingest_path(path).with_suffix(".tmp.npz")
+    np.savez(
+        tmp,
+        version=np.int32(INGEST_VERSION),
+        dino=derive_dino(rgb),
+        loftr=derive_loftr(rgb),
+        dust3r=derive_dust3r(rgb),
+    )
+    os.replace(tmp, ingest_path(path))
+    return content_hash or sha256_file(path)
+
+
+def store_upload(session: Session, path: Path, content_hash: str) -> str:
+    """정규화한 업로드와 파생 배열을 내용 주소 저장소로 옮기고 blob 참조를 반환합니다.
+
+    같은 사진이 이미 저장돼 있으면 새로 쓰지 않고 기존 파일(과 파생 배열)을 함께 씁니다.
+    참조 수는 Pictures 행을 만들 때 호출 측에서 올립니다.
+    """
+    with open(path, "rb") as f:
+        # 정규화 중에 형식이 바뀌었을 수 있으므로 최종 파일로 판별
+        suffix = sniff_image(f.read(SNIFF_BYTES)) or path.suffix
+    derived = ingest_path(path)
+    ref = put_blob(session, path, content_hash, suffix)
+    target = ingest_path(get_blob_store().local_path(ref_key(ref)))
+    if target.exists():
+        derived.unlink(missing_ok=True)
+    elif derived.exists():
+        os.replace(derived, target)
+    return ref
+
+
+def load_ingested(path: str | Path) -> dict[str, np.ndarray] | None:
+    """저장된 파생 배열을 읽습니다. 없거나 버전이 다르면 None (호출 측에서 원본을 디코딩)."""
+    derived = ingest_path(path)
+    if not derived.exists():
+        return None
+    with np.load(derived) as data:
+        if int(data["version"]) != INGEST_VERSION:
+            return None
+        return {key: data[key] for key in ("dino", "loftr", "dust3r")}
@@ -0,0 +1,637 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from gimmary.app.missions.artifacts import (
+    build_variant, forget_model, model_url, release_model, retain_model, store_model,
+)
+from gimmary.app.missions.inference_pool import get_inference_pool, resolve
+from gimmary.app.missions.ingest import ingest_path
+from gimmary.app.missions.quality import get_tier, pick_tier, seconds_per_pair, tier_rank
+from gimmary.app.missions.scheduler import QueuedJob, estimate_wait, fair_share_order, team_priority, typical_duration
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from gimmary.app.missions.storage import collect_garbage, local_file, sweep_staging
+from gimmary.app.missions.utils import sha256_file
+from gimmary.database.connection import session_scope
+from gimmary.database.models import GroupMission, Mission, Pictures, ReconstructionJob, JobKind, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """재구성 대기열이 가득 차 새 작업을 받을 수 없음. retry_after(초) 뒤에 다시 시도하라고 안내합니다."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ─────────────────────────────────────────────
+# 큐 조작 (reconstruction_jobs 테이블)
+# ─────────────────────────────────────────────
+def enqueue_reconstruction(
+    session: Session,
+    group_mission_id: int,
+    mission_id: int,
+    quality: str | None = None,
+    deadline: float | None = None,
+    admit: bool = True,
+) -> ReconstructionJob:
+    """재구성 작업을 큐에 넣습니다.
+
+    quality 없이 deadline(초)만 주면 실행 시점에 최근 작업 기록으로 그 안에 끝날 가장 높은 단계를 고르고,
+    둘 다 없으면 MISSION_RECONSTRUCT_QUALITY를 씁니다.
+    admit이면 대기열 상한을 확인하고, 넘으면 QueueFull을 던집니다 (호출 측에서 이미 확인했다면 False).
+    """
+    if quality is not None:
+        get_tier(quality)
+    elif deadline is None:
+        quality = MISSION_SETTINGS.RECONSTRUCT_QUALITY
+    if admit:
+        check_admission(session, _mission_team(session, mission_id))
+    return _enqueue(session, JobKind.RECONSTRUCT, group_mission_id, mission_id, quality=quality, deadline=deadline)
+
+
+def check_admission(session: Session, team_id: int | None, count: int = 1) -> None:
+    """재구성 작업 count개를 더 받을 수 있는지 확인합니다 (전체/팀별 대기열 상한). 안 되면 QueueFull."""
+    queued = dict(
+        session.query(ReconstructionJob.team_id, func.count(ReconstructionJob.id))
+        .filter(
+            ReconstructionJob.status == JobStatus.QUEUED.value,
+            ReconstructionJob.kind == JobKind.RECONSTRUCT.value,
+        )
+        .group_by(ReconstructionJob.team_id)
+        .all()
+    )
+    total_limit, team_limit = MISSION_SETTINGS.JOB_MAX_QUEUED, MISSION_SETTINGS.JOB_MAX_QUEUED_PER_TEAM
+    if total_limit and sum(queued.values()) + count > total_limit:
+        message = "Reconstruction queue is full"
+    elif team_limit and queued.get(team_id, 0) + count > team_limit:
+        message = "Too many reconstructions queued for this team"
+    else:
+        return
+    # 실행 중인 작업 중 하나가 끝나 대기열이 한 칸 줄어들 때까지의 예상 시간 (슬롯들이 고르게 끝난다고 봄)
+    raise QueueFull(message, retry_after=_typical_duration(session) / _running_slots(session))
+
+
+def queue_position(session: Session, job_id: int) -> tuple[int, float] | None:
+    """대기 중인 재구성 작업의 (순번(1부터), 시작까지 예상 시간 초). 대기 중이 아니면 None."""
+    queued = [
+        QueuedJob(*row)
+        for row in session.query(ReconstructionJob.id, ReconstructionJob.team_id, ReconstructionJob.available_at)
+        .filter(
+            ReconstructionJob.status == JobStatus.QUEUED.value,
+            ReconstructionJob.kind == JobKind.RECONSTRUCT.value,
+        )
+        .all()
+    ]
+    order = fair_share_order(queued, _running_by_team(session))
+    if job_id not in order:
+        return None
+    position = order.index(job_id) + 1
+    return position, estimate_wait(position, _running_slots(session), _typical_duration(session))
+
+
+def _mission_team(session: Session, mission_id: int) -> int | None:
+    mission = session.get(Mission, mission_id)
+    return mission.team_id if mission else None
+
+
+def _running_by_team(session: Session) -> dict[int | None, int]:
+    return dict(
+        session.query(ReconstructionJob.team_id, func.count(ReconstructionJob.id))
+        .filter(
+            ReconstructionJob.status == JobStatus.RUNNING.value,
+            ReconstructionJob.kind == JobKind.RECONSTRUCT.value,
+        )
+        .group_by(ReconstructionJob.team_id)
+        .all()
+    )
+
+
+def _running_slots(session: Session) -> int:
+    """동시에 실행되는 재구성 수: 상한이 있으면 상한, 없으면 지금 실행 중인 수 (최소 1)."""
+    return MISSION_SETTINGS.JOB_MAX_RUNNING or max(1, sum(_running_by_team(session).values()))
+
+
+def _typical_duration(session: Session) -> float:
+    return typical_duration([seconds for _, _, seconds in _recent_durations(session)], MISSION_SETTINGS.JOB_DEFAULT_DURATION)
+
+
+def enqueue_compression(session: Session, group_mission_id: int, mission_id: int, artifact_id: int) -> ReconstructionJob:
+    """생성된 모델의 변형(Draco 압축 등) 하나를 만드는 작업을 큐에 넣습니다."""
+    return _enqueue(session, JobKind.COMPRESS, group_mission_id, mission_id, artifact_id=artifact_id)
+
+
+def enqueue_verification(session: Session, group_mission_id: int, mission_id: int, picture_id: int) -> ReconstructionJob:
+    """업로드된 사진 한 장을 기존 사진들과 대조하는 작업을 큐에 넣습니다."""
+    return _enqueue(session, JobKind.VERIFY, group_mission_id, mission_id, picture_id)
+
+
+def _enqueue(
+    session: Session, kind: JobKind, group_mission_id: int, mission_id: int, picture_id: int | None = None, **fields
+) -> ReconstructionJob:
+    now = datetime.utcnow()
+    job = ReconstructionJob(
+        group_mission_id=group_mission_id,
+        mission_id=mission_id,
+        team_id=_mission_team(session, mission_id),
+        kind=kind.value,
+        picture_id=picture_id,
+        **fields,
+        status=JobStatus.QUEUED.value,
+        attempts=0,
+        max_attempts=MISSION_SETTINGS.JOB_MAX_ATTEMPTS,
+        available_at=now,
+        created_at=now,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def claim_next_job(session: Session, worker_id: str) -> int | None:
+    """실행 가능한 작업 하나를 잠그고(SKIP LOCKED) 이 워커 소유로 표시합니다.
+
+    업로드 검증·모델 압축 작업은 가벼우므로 먼저, 재구성 작업은 동시 실행 상한 안에서 팀별 공정 분배 순서로 고릅니다.
+    """
+    now = datetime.utcnow()
+    job = _next_light_job(session, now) or _next_reconstruction(session, now)
+    if not job:
+        return None
+    job.status = JobStatus.RUNNING.value
+    job.worker_id = worker_id
+    job.attempts = (job.attempts or 0) + 1
+    job.stage = None
+    job.error = None
+    job.started_at = now
+    job.heartbeat_at = now
+    session.commit()
+
+    if job.kind == JobKind.RECONSTRUCT.value and _over_capacity(session, job):
+        # 여러 워커가 동시에 마지막 슬롯을 잡았으면 가장 늦게 잡은 쪽이 양보
+        job.status = JobStatus.QUEUED.value
+        job.worker_id = None
+        job.attempts -= 1
+        job.started_at = None
+        session.commit()
+        return None
+    return job.id
+
+
+def _queued(session: Session, now: datetime, *kinds: JobKind):
+    return (
+        session.query(ReconstructionJob)
+        .filter(
+            ReconstructionJob.status == JobStatus.QUEUED.value,
+            ReconstructionJob.kind.in_([kind.value for kind in kinds]),
+            ReconstructionJob.available_at <= now,
+        )
+    )
+
+
+def _next_light_job(session: Session, now: datetime) -> ReconstructionJob | None:
+    return (
+        _queued(session, now, JobKind.VERIFY, JobKind.COMPRESS)
+        .order_by(ReconstructionJob.available_at, ReconstructionJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+
+
+def _next_reconstruction(session: Session, now: datetime) -> ReconstructionJob | None:
+    running = _running_by_team(session)
+    if MISSION_SETTINGS.JOB_MAX_RUNNING and sum(running.values()) >= MISSION_SETTINGS.JOB_MAX_RUNNING:
+        return None
+
+    heads = [
+        QueuedJob(0, team_id, available_at)
+        for team_id, available_at in (
+            _queued(session, now, JobKind.RECONSTRUCT)
+            .with_entities(ReconstructionJob.team_id, func.min(ReconstructionJob.available_at))
+            .group_by(ReconstructionJob.team_id)
+            .all()
+        )
+    ]
+    # 실행 중인 작업이 적은 팀부터 (scheduler.fair_share_order와 같은 규칙)
+    for head in sorted(heads, key=lambda h: team_priority(running, h.team_id, h)):
+        if MISSION_SETTINGS.JOB_MAX_RUNNING_PER_TEAM and running.get(head.team_id, 0) >= MISSION_SETTINGS.JOB_MAX_RUNNING_PER_TEAM:
+            continue
+        team_filter = (
+            ReconstructionJob.team_id.is_(None) if head.team_id is None else ReconstructionJob.team_id == head.team_id
+        )
+        job = (
+            _queued(session, now, JobKind.RECONSTRUCT)
+            .filter(team_filter)
+            .order_by(ReconstructionJob.available_at, ReconstructionJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job:
+            return job
+    return None
+
+
+def _over_capacity(session: Session, job: ReconstructionJob) -> bool:
+    """커밋 후 다시 세어 보아 이 작업이 동시 실행 상한(전체/팀별) 밖으로 밀렸는지."""
+    def ahead(*criteria) -> int:
+        return (
+            session.query(func.count(ReconstructionJob.id))
+            .filter(
+                ReconstructionJob.status == JobStatus.RUNNING.value,
+                ReconstructionJob.kind == JobKind.RECONSTRUCT.value,
+                ReconstructionJob.id != job.id,
+                (ReconstructionJob.started_at < job.started_at)
+                | ((ReconstructionJob.started_at == job.started_at) & (ReconstructionJob.id < job.id)),
+                *criteria,
+            )
+            .scalar()
+        )
+
+    total_limit, team_limit = MISSION_SETTINGS.JOB_MAX_RUNNING, MISSION_SETTINGS.JOB_MAX_RUNNING_PER_TEAM
+    if total_limit and ahead() >= total_limit:
+        return True
+    if team_limit and job.team_id is not None and ahead(ReconstructionJob.team_id == job.team_id) >= team_limit:
+        return True
+    return False
+
+
+def recover_stale_jobs(session: Session) -> int:
+    """하트비트가 끊긴(워커가 죽은) 작업을 다시 큐에 넣거나 실패 처리합니다."""
+    now = datetime.utcnow()
+    deadline = now - timedelta(seconds=MISSION_SETTINGS.JOB_STALE_AFTER)
+    stale = (
+        session.query(ReconstructionJob)
+        .filter(
+            ReconstructionJob.status == JobStatus.RUNNING.value,
+            ReconstructionJob.heartbeat_at < deadline,
+        )
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in stale:
+        logger.warning("recovering reconstruction job %s abandoned by %s", job.id, job.worker_id)
+        _retry_or_fail(job, f"worker {job.worker_id} stopped heartbeating", now)
+    session.commit()
+    return len(stale)
+
+
+def _retry_or_fail(job: ReconstructionJob, error: str, now: datetime, retryable: bool = True) -> None:
+    job.error = error
+    job.stage = None
+    job.worker_id = None
+    if not retryable or job.attempts >= job.max_attempts:
+        job.status = JobStatus.FAIL.value
+        job.finished_at = now
+        return
+    # 지수 백오프: backoff, 2*backoff, 4*backoff, ...
+    delay = MISSION_SETTINGS.JOB_RETRY_BACKOFF * 2 ** max(0, job.attempts - 1)
+    job.status = JobStatus.QUEUED.value
+    job.available_at = now + timedelta(seconds=delay)
+
+
+def _update_job(job_id: int, worker_id: str, **fields) -> bool:
+    """이 워커가 아직 소유한 실행 중 작업만 갱신합니다. 하트비트도 함께 갱신됩니다."""
+    fields["heartbeat_at"] = datetime.utcnow()
+    with session_scope() as session:
+        updated = (
+            session.query(ReconstructionJob)
+            .filter(
+                ReconstructionJob.id == job_id,
+                ReconstructionJob.worker_id == worker_id,
+                ReconstructionJob.status == JobStatus.RUNNING.value,
+            )
+            .update(fields, synchronize_session=False)
+        )
+    return updated > 0
+
+
+def _heartbeat(job_id: int, worker_id: str, stop: threading.Event) -> None:
+    while not stop.wait(MISSION_SETTINGS.JOB_HEARTBEAT_INTERVAL):
+        try:
+            if not _update_job(job_id, worker_id):
+                logger.warning("lost ownership of reconstruction job %s", job_id)
+                return
+        except Exception:
+            logger.exception("heartbeat for reconstruction job %s failed", job_id)
+
+
+# ─────────────────────────────────────────────
+# 작업 실행
+# ─────────────────────────────────────────────
+def run_job(job_id: int, worker_id: str) -> None:
+    with session_scope() as session:
+        job = session.get(ReconstructionJob, job_id)
+        if job is None:
+            logger.warning("reconstruction job %s disappeared before it could run", job_id)
+            return
+        kind, group_mission_id, mission_id, picture_id = job.kind, job.group_mission_id, job.mission_id, job.picture_id
+        quality, deadline, artifact_id = job.quality, job.deadline, job.artifact_id
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, worker_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        if kind == JobKind.VERIFY.value:
+            fields = _verify_upload(group_mission_id, picture_id)
+        elif kind == JobKind.COMPRESS.value:
+            fields = _build_artifact(artifact_id)
+        else:
+            fields = _reconstruct(job_id, worker_id, group_mission_id, mission_id, quality, deadline)
+    except Exception as e:
+        logger.exception("reconstruction job %s failed", job_id)
+        with session_scope() as session:
+            job = (
+                session.query(ReconstructionJob)
+                .filter(
+                    ReconstructionJob.id == job_id,
+                    ReconstructionJob.worker_id == worker_id,
+                    ReconstructionJob.status == JobStatus.RUNNING.value,
+                )
+                .with_for_update()
+                .first()
+            )
+            if job:
+                # 입력 자체가 잘못된 경우(사진 부족 등)는 재시도하지 않음
+                _retry_or_fail(job, str(e), datetime.utcnow(), retryable=not isinstance(e, ValueError))
+        return
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    _update_job(job_id, worker_id, stage=None, finished_at=datetime.utcnow(), **fields)
+
+
+def _verify_upload(group_mission_id: int, picture_id: int) -> dict:
+    """새 사진을 이미 검증된 사진들과 대조해 그룹 미션의 union-find 상태를 갱신합니다.
+
+    component_id는 같은 컴포넌트에 속한 사진들의 대표(가장 작은) 사진 id입니다.
+    DINOv2/LoFTR 추론은 트랜잭션 밖에서 하고, 결과를 합칠 때만 group_missions 행을 잠급니다.
+    추론하는 동안 다른 사진이 검증되면 그 사진들과도 비교한 뒤 합칩니다.
+    """
+    with session_scope() as session:
+        pic = session.get(Pictures, picture_id)
+        if pic is None:
+            raise ValueError(f"picture {picture_id} not found")
+        if pic.content_hash is None:
+            pic.content_hash = sha256_file(local_file(pic.url))
+        path, content_hash = local_file(pic.url), pic.content_hash
+
+    def accepted_since(session: Session):
+        """아직 비교하지 않은, 검증이 끝난 같은 그룹 미션의 사진."""
+        return session.query(Pictures).filter(
+            Pictures.group_mission_id == group_mission_id,
+            Pictures.id != picture_id,
+            Pictures.component_id.isnot(None),
+            Pictures.id.notin_(compared),
+        )
+
+    compared: set[int] = set()
+    matched_ids: set[int] = set()
+    logs = []
+    while True:
+        with session_scope() as session:
+            batch = [(a.id, local_file(a.url), a.content_hash, a.component_id) for a in accepted_since(session)]
+        if batch:
+            roots, log = _infer("match_against_accepted", path, content_hash, [(p, h, c) for _, p, h, c in batch])
+            logs.append(log)
+            matched_ids |= {i for i, _, _, c in batch if c in roots}
+            compared |= {i for i, _, _, _ in batch}
+
+        with session_scope() as session:
+            session.query(GroupMission).filter(GroupMission.id == group_mission_id).with_for_update().first()
+            if accepted_since(session).first() is not None:
+                # 추론하는 동안 새로 검증된 사진이 있음 → 잠금을 풀고 그 사진들과도 비교
+                continue
+
+            # union: 추론 뒤에 다른 작업이 합쳤을 수 있으므로 일치한 사진들의 현재 컴포넌트를 다시 읽어 합침
+            roots = {
+                c for (c,) in session.query(Pictures.component_id).filter(Pictures.id.in_(matched_ids))
+            } if matched_ids else set()
+            root = min(roots | {picture_id})
+            if roots:
+                (
+                    session.query(Pictures)
+                    .filter(Pictures.group_mission_id == group_mission_id, Pictures.component_id.in_(roots))
+                    .update({"component_id": root, "matched": True}, synchronize_session=False)
+                )
+            pic = session.get(Pictures, picture_id)
+            pic.component_id = root
+            pic.matched = matched = bool(matched_ids) or not compared
+            pic.verified_at = datetime.utcnow()
+
+        log = "\n".join(line for line in logs if line)
+        if matched:
+            log = (log + "\n✓ 기존 사진과 일치").strip()
+        else:
+            log = (log + "\n✗ 기존 사진들과 같은 피사체로 확인되지 않았습니다").strip()
+        return {"status": JobStatus.SUCCESS.value, "log": log}
+
+
+def _reconstruct(
+    job_id: int,
+    worker_id: str,
+    group_mission_id: int,
+    mission_id: int,
+    quality: str | None = None,
+    deadline: float | None = None,
+) -> dict:
+    """모델 생성 → 모델 저장(변형 작업 예약) → 미션 model_url 저장까지 수행하고 작업 결과 필드를 반환합니다."""
+    enter = partial(_set_stage, job_id, worker_id)
+
+    with session_scope() as session:
+        pics = session.query(Pictures).filter(Pictures.group_mission_id == group_mission_id).all()
+        image_paths = [str(local_file(p.url)) for p in pics]
+        components = {p.component_id for p in pics}
+        if quality is None:
+            tier = pick_tier(len(image_paths), deadline, seconds_per_pair(_recent_durations(session)))
+            quality = tier.name
+    _update_job(job_id, worker_id, quality=quality)
+
+    # 업로드마다 검증한 결과 모든 사진이 한 컴포넌트로 연결됐다면 전체 검증을 생략
+    pre_verified = len(components) == 1 and None not in components
+    # 업로드 시 만든 모델별 입력이 모두 있으면 원본을 디코딩해 넘길 필요가 없음
+    shared_images = None if all(ingest_path(p).exists() for p in image_paths) else image_paths
+    gen = _infer(
+        "generate_3d_model",
+        image_paths,
+        use_verify=not pre_verified,
+        on_stage=enter,
+        quality=quality,
+        shared_images=shared_images,
+    )
+    log = gen.get("log", "")
+    if pre_verified:
+        log = f"✓ 업로드 시 검증으로 동일 피사체 확인 ({len(image_paths)}장)\n" + log
+    if deadline is not None:
+        log = f"목표 {deadline:.0f}초 → 품질 {quality}\n" + log
+    timings = dict(gen.get("timings", {}))
+    if not (gen.get("success") and gen.get("mesh_path")):
+        return {"status": JobStatus.FAIL.value, "log": log, "timings": json.dumps(timings)}
+
+    # 내용 해시로 저장하고, Draco 등 변형은 별도 작업으로 한 번만 만듦 (다운로드 시에는 압축하지 않음)
+    enter("store")
+    started = time.perf_counter()
+    with session_scope() as session:
+        lods = {name: Path(p) for name, p in gen.get("lod_paths", {}).items()}
+        content_hash, pending = store_model(session, Path(gen["mesh_path"]), lods)
+        for artifact in pending:
+            variant_job = enqueue_compression(session, group_mission_id, mission_id, artifact.id)
+            log = (log + f"\n{artifact.variant} 변형은 작업 #{variant_job.id}에서 생성").strip()
+    timings["store"] = time.perf_counter() - started
+
+    # 상태 업데이트: 미션 모델 URL 저장
+    enter("save")
+    download_url = model_url(content_hash)
+    with session_scope() as session:
+        mission = session.query(Mission).filter(Mission.id == mission_id).with_for_update().first()
+        # 미리보기가 나중에 끝나더라도 이미 저장된 더 높은 품질의 모델을 덮어쓰지 않음
+        current = (
+            session.query(ReconstructionJob.quality)
+            .filter(ReconstructionJob.download_url == mission.model_url, ReconstructionJob.status == JobStatus.SUCCESS.value)
+            .first()
+            if mission and mission.model_url else None
+        )
+        if mission and (current is None or tier_rank(current.quality) <= tier_rank(quality)):
+            # 미션이 가리키는 모델이 바뀌면 원본 파일 참조도 옮김
+            if mission.model_url != download_url:
+                retain_model(session, download_url)
+                release_model(session, mission.model_url)
+            mission.model_url = download_url
+        elif mission:
+            log = (log + f"\n더 높은 품질({current.quality})의 모델이 이미 있어 미션 모델은 유지합니다").strip()
+
+    return {
+        "status": JobStatus.SUCCESS.value,
+        "log": log,
+        "timings": json.dumps(timings),
+        "download_url": download_url,
+        "image_count": gen.get("image_count"),
+    }
+
+
+def _build_artifact(artifact_id: int) -> dict:
+    """모델 변형 하나를 만듭니다. 변환 도구(gltf-pipeline)가 없으면 재시도하지 않고 실패로 남깁니다."""
+    with session_scope() as session:
+        try:
+            output = build_variant(session, artifact_id)
+        except FileNotFoundError as e:
+            return {"status": JobStatus.FAIL.value, "log": f"변형을 만들 수 없습니다: {e}"}
+    return {"status": JobStatus.SUCCESS.value, "log": output}
+
+
+def _recent_durations(session: Session, limit: int = 50) -> list[tuple[str, int, float]]:
+    """최근 성공한 재구성 작업의 (품질, 사진 수, 검증+재구성+압축 소요 시간) 목록."""
+    rows = (
+        session.query(ReconstructionJob.quality, ReconstructionJob.image_count, ReconstructionJob.timings)
+        .filter(
+            ReconstructionJob.kind == JobKind.RECONSTRUCT.value,
+            ReconstructionJob.status == JobStatus.SUCCESS.value,
+            ReconstructionJob.quality.isnot(None),
+            ReconstructionJob.image_count.isnot(None),
+            ReconstructionJob.timings.isnot(None),
+        )
+        .order_by(ReconstructionJob.finished_at.desc())
+        .limit(limit)
+        .all()
+    )
+    durations = []
+    for quality, image_count, timings in rows:
+        stages = json.loads(timings)
+        durations.append((quality, image_count, sum(stages.get(k, 0.0) for k in ("verify", "reconstruct", "compress", "store"))))
+    return durations
+
+
+def _set_stage(job_id: int, worker_id: str, stage: str) -> None:
+    # 추론 프로세스로 넘겨도 되도록 모듈 수준 함수 + partial로 사용
+    _update_job(job_id, worker_id, stage=stage)
+
+
+def _infer(fn_name: str, *args, shared_images: list[str] | None = None, **kwargs):
+    """추론 함수를 추론 프로세스 풀(설정 시) 또는 현재 스레드에서 실행합니다."""
+    pool = get_inference_pool()
+    if pool is not None:
+        return pool.call(fn_name, *args, shared_images=shared_images, **kwargs)
+    # ML 스택(torch 등)은 실제로 작업을 처리할 때만 import
+    return resolve(fn_name)(*args, **kwargs)
+
+
+# ─────────────────────────────────────────────
+# 워커
+# ─────────────────────────────────────────────
+class JobWorker:
+    """reconstruction_jobs 큐를 폴링하며 작업을 하나씩 처리합니다.
+
+    API 프로세스 안의 스레드(`start_embedded_workers`)로도, 별도 프로세스
+    (`gimmary-worker`)로도 실행할 수 있고, 여러 워커가 같은 큐를 동시에 비웁니다.
+    """
+
+    def __init__(self, worker_id: str | None = None) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._last_recovery = 0.0
+        self._last_collection = 0.0
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> bool:
+        """작업을 하나 처리했으면 True, 큐가 비어 있으면 False."""
+        if time.monotonic() - self._last_recovery >= MISSION_SETTINGS.JOB_STALE_AFTER / 2:
+            with session_scope() as session:
+                recover_stale_jobs(session)
+            self._last_recovery = time.monotonic()
+        if time.monotonic() - self._last_collection >= MISSION_SETTINGS.STORAGE_GC_INTERVAL:
+            self._last_collection = time.monotonic()
+            self._collect_storage()
+
+        with session_scope() as session:
+            job_id = claim_next_job(session, self.worker_id)
+        if job_id is None:
+            return False
+        logger.info("worker %s claimed reconstruction job %s", self.worker_id, job_id)
+        run_job(job_id, self.worker_id)
+        return True
+
+    def _collect_storage(self) -> None:
+        """참조가 없어진 저장소 파일과 오래된 임시 파일을 지웁니다."""
+        try:
+            with session_scope() as session:
+                collect_garbage(session, on_delete=forget_model)
+            sweep_staging()
+        except Exception:
+            logger.exception("storage garbage collection failed")
+
+    def run_forever(self) -> None:
+        logger.info("reconstruction worker %s started", self.worker_id)
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                logger.exception("reconstruction worker %s loop failed", self.worker_id)
+            self._stop.wait(MISSION_SETTINGS.JOB_POLL_INTERVAL)
+        logger.info("reconstruction worker %s stopped", self.worker_id)
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run_forever, name=f"reconstruction-{self.worker_id}", daemon=True)
+        thread.start()
+        return thread
+
+
+def start_embedded_workers(count: int) -> list[JobWorker]:
+    workers = [JobWorker() for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
@@ -0,0 +1,126 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# 재구성된 메시로 여러 단계의 LOD(level of detail)를 만듭니다.
+# 위치/색 양자화 → 중복 정점 병합 → (예산을 넘으면) quadric decimation 순으로 줄이고,
+# 내보낸 GLB 크기가 단계별 예산 안에 들어올 때까지 반복합니다. trimesh/open3d는 함수 안에서만 import 합니다.
+
+
+@dataclass(frozen=True)
+class LodLevel:
+    name: str
+    max_bytes: int               # 내보낸 GLB(Draco 전) 크기 예산
+    position_bits: int           # bbox 긴 변을 2^bits 격자로 양자화
+    color_bits: int              # 채널당 색 비트 수 (8이면 그대로)
+
+
+# 큰 단계 → 작은 단계 순서. 원본 메시는 그대로 "full"로 둡니다.
+LOD_LEVELS = (
+    LodLevel("medium", max_bytes=4 * 1024 * 1024, position_bits=14, color_bits=6),
+    LodLevel("preview", max_bytes=512 * 1024, position_bits=11, color_bits=5),
+)
+# 예산을 맞추기 위한 decimation 반복 상한과 최소 면 수
+MAX_DECIMATION_ROUNDS = 4
+MIN_FACES = 500
+
+
+def glb_size(mesh) -> int:
+    return len(mesh.export(file_type="glb"))
+
+
+def vertex_colors(mesh) -> np.ndarray | None:
+    """(N, 4) uint8 정점 색. 텍스처 등 정점 색이 아니면 None."""
+    if getattr(mesh.visual, "kind", None) != "vertex":
+        return None
+    return np.asarray(mesh.visual.vertex_colors, dtype=np.uint8)
+
+
+def quantize(mesh, position_bits: int, color_bits: int):
+    """정점 위치를 격자에, 색을 color_bits로 양자화한 뒤 겹친 정점과 퇴화한 면을 정리한 새 메시."""
+    import trimesh
+
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    lo = vertices.min(axis=0)
+    step = max(float(np.ptp(vertices, axis=0).max()), 1e-12) / (2 ** position_bits - 1)
+    vertices = np.round((vertices - lo) / step) * step + lo
+
+    colors = vertex_colors(mesh)
+    if colors is not None and color_bits < 8:
+        shift = 8 - color_bits
+        rgb = colors[:, :3] >> shift << shift | (1 << (shift - 1))  # 구간 가운데 값
+        colors = np.concatenate([rgb, colors[:, 3:]], axis=1).astype(np.uint8)
+
+    out = trimesh.Trimesh(vertices, np.asarray(mesh.faces), vertex_colors=colors, process=False)
+    out.merge_vertices()
+    out.update_faces(out.nondegenerate_faces())
+    out.remove_unreferenced_vertices()
+    return out
+
+
+def decimate(mesh, face_count: int):
+    """open3d quadric decimation (정점 색 유지). open3d가 없으면 None."""
+    try:
+        import open3d as o3d
+    except ImportError:
+        return None
+    import trimesh
+
+    o3d_mesh = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(np.asarray(mesh.vertices, dtype=np.float64)),
+        o3d.utility.Vector3iVector(np.asarray(mesh.faces, dtype=np.int32)),
+    )
+    colors = vertex_colors(mesh)
+    if colors is not None:
+        o3d_mesh.vertex_colors = o3d.utility.Vector3dVector(colors[:, :3] / 255.0)
+    simplified = o3d_mesh.simplify_quadric_decimation(target_number_of_triangles=face_count)
+
+    out_colors = None
+    if colors is not None:
+        rgb = np.clip(np.round(np.asarray(simplified.vertex_colors) * 255), 0, 255).astype(np.uint8)
+        out_colors = np.concatenate([rgb, np.full((len(rgb), 1), 255, dtype=np.uint8)], axis=1)
+    return trimesh.Trimesh(
+        np.asarray(simplified.vertices), np.asarray(simplified.triangles), vertex_colors=out_colors, process=False
+    )
+
+
+def clustering_bits(mesh, face_count: int) -> int:
+    """정점 클러스터링으로 면 수를 face_count 정도로 줄이는 격자 비트 수.
+
+    면 수는 격자 칸 크기의 제곱에 반비례하므로, 평균 모서리 길이를 sqrt(현재/목표)배 한 칸을 씁니다.
+    """
+    cell = float(mesh.edges_unique_length.mean()) * math.sqrt(len(mesh.faces) / max(face_count, 1))
+    extent = float(np.ptp(np.asarray(mesh.vertices), axis=0).max())
+    return max(4, int(math.log2(max(extent / max(cell, 1e-12), 2))))
+
+
+def build_lod(mesh, level: LodLevel):
+    """level 예산 안에 들어오는 메시와 그 GLB 크기. 최소 면 수까지 줄여도 넘으면 그 결과를 그대로 반환합니다."""
+    bits = level.position_bits
+    lod = quantize(mesh, bits, level.color_bits)
+    size = glb_size(lod)
+    for _ in range(MAX_DECIMATION_ROUNDS):
+        if size <= level.max_bytes or len(lod.faces) <= MIN_FACES:
+            break
+        # 크기는 면 수에 거의 비례하므로 비율만큼 (여유를 두고) 줄임
+        target = max(MIN_FACES, int(len(lod.faces) * level.max_bytes / size * 0.9))
+        smaller = decimate(lod, target)
+        if smaller is None:
+            # decimation을 못 쓰면 격자를 거칠게 해 정점 클러스터링으로 줄임
+            bits = min(bits - 1, clustering_bits(lod, target))
+            lod = quantize(mesh, bits, level.color_bits)
+        else:
+            lod = quantize(smaller, bits, level.color_bits)
+        size = glb_size(lod)
+    return lod, size
+
+
+def build_lods(mesh, levels: tuple[LodLevel, ...] = LOD_LEVELS) -> dict[str, tuple[object, int]]:
+    """단계 이름 → (메시, GLB 크기). 각 단계는 바로 위 단계에서 줄여 나갑니다."""
+    lods = {}
+    source = mesh
+    for level in levels:
+        source, size = build_lod(source, level)
+        lods[level.name] = (source, size)
+    return lods
@@ -0,0 +1,54 @@
+import logging
+import threading
+import time
+
+from gimmary.app.missions.residency import RESIDENCY
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPreloader:
+    """앱 시작 시 백그라운드 스레드에서 모델을 올리고 준비 상태(readiness)를 보고합니다."""
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = list(names)
+        self.error: str | None = None
+        self.timings: dict[str, float] = {}
+        self._done = threading.Event()
+        if not self.names:
+            self._done.set()
+
+    def start(self) -> None:
+        if self.names:
+            threading.Thread(target=self._run, name="model-preload", daemon=True).start()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            from gimmary.app.missions.generate_model import warmup_models
+            self.timings = warmup_models(self.names)
+            logger.info("models %s warmed up in %.1fs", self.names, time.perf_counter() - started)
+        except Exception as e:
+            logger.exception("model preload failed")
+            self.error = str(e)
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def status(self) -> dict:
+        # 모델 loader는 generate_model이 import 된 뒤에야 등록되므로 그 전에는 비어 있음
+        residency = RESIDENCY.snapshot()
+        return {
+            "ready": self.ready,
+            "preload": self.names,
+            "models": RESIDENCY.resident(),
+            "resident_bytes": residency["resident_bytes"],
+            "rss_bytes": residency["rss_bytes"],
+            "residency": residency["models"],
+            "model_events": residency["events"],
+            "warmup_seconds": self.timings,
+            "error": self.error,
+        }
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from statistics import median
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    """재구성 품질 단계. API/워커 양쪽에서 쓰므로 torch 없이 import 됩니다."""
+
+    name: str
+    size: int                    # DUSt3R 입력 긴 변 (px)
+    max_images: int              # 재구성에 쓰는 최대 사진 수
+    complete_max_images: int     # 이 장수 이하면 complete 그래프, 그 이상은 유사도 kNN 그래프
+    knn: int
+    align_iters: int             # 전역 정렬 반복 상한
+    min_conf_thr: int            # 메시로 남길 포인트의 최소 신뢰도 (낮을수록 포인트가 많음)
+    seconds_per_pair: float      # 기록이 없을 때 쓰는 CPU 기준 페어당 예상 소요 시간
+
+
+# 낮은 품질 → 높은 품질 순서
+QUALITY_TIERS = {
+    "preview": QualityTier("preview", size=384, max_images=8, complete_max_images=3, knn=2,
+                           align_iters=100, min_conf_thr=5, seconds_per_pair=1.5),
+    "standard": QualityTier("standard", size=512, max_images=16, complete_max_images=4, knn=3,
+                            align_iters=300, min_conf_thr=3, seconds_per_pair=4.0),
+    "high": QualityTier("high", size=512, max_images=32, complete_max_images=6, knn=5,
+                        align_iters=500, min_conf_thr=2, seconds_per_pair=5.0),
+}
+DEFAULT_QUALITY = "standard"
+
+
+def get_tier(name: str) -> QualityTier:
+    try:
+        return QUALITY_TIERS[name]
+    except KeyError:
+        raise ValueError(f"unknown quality {name!r} (expected one of {', '.join(QUALITY_TIERS)})") from None
+
+
+def tier_rank(name: str | None) -> int:
+    return list(QUALITY_TIERS).index(name) if name in QUALITY_TIERS else -1
+
+
+def count_pairs(tier: QualityTier, n_images: int) -> int:
+    """이 단계에서 DUSt3R가 추론할 (양방향) 페어 수의 추정치."""
+    n = min(n_images, tier.max_images)
+    if n <= tier.complete_max_images:
+        return n * (n - 1)
+    return 2 * n * min(tier.knn, n - 1)
+
+
+def seconds_per_pair(history: list[tuple[str, int, float]]) -> dict[str, float]:
+    """과거 작업 기록 (단계, 사진 수, 소요 시간 초)에서 단계별 페어당 소요 시간의 중앙값을 구합니다."""
+    samples: dict[str, list[float]] = {}
+    for name, n_images, seconds in history:
+        if name in QUALITY_TIERS:
+            pairs = count_pairs(QUALITY_TIERS[name], n_images)
+            if pairs:
+                samples.setdefault(name, []).append(seconds / pairs)
+    return {name: median(values) for name, values in samples.items()}
+
+
+def estimate_seconds(tier: QualityTier, n_images: int, rates: dict[str, float] | None = None) -> float:
+    rate = (rates or {}).get(tier.name, tier.seconds_per_pair)
+    return rate * count_pairs(tier, n_images)
+
+
+def pick_tier(n_images: int, deadline: float, rates: dict[str, float] | None = None) -> QualityTier:
+    """deadline(초) 안에 끝날 것으로 예상되는 가장 높은 단계. 어느 것도 안 되면 가장 낮은 단계."""
+    tiers = list(QUALITY_TIERS.values())
+    for tier in reversed(tiers):
+        if estimate_seconds(tier, n_images, rates) <= deadline:
+            return tier
+    return tiers[0]
@@ -0,0 +1,227 @@
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from gimmary.app.missions.settings import MISSION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# 모델을 필요할 때 올리고, 오래 안 쓰였거나(MODEL_IDLE_TTL) 프로세스 RSS가
+# MODEL_MEMORY_CEILING_MB에 가까워지면 사용 중이 아닌 모델부터 내립니다.
+# 상태 보고(/health/ready)에서도 쓰므로 torch는 import 하지 않습니다.
+
+# 보관하는 최근 load/unload 이벤트 수
+EVENT_HISTORY = 100
+
+
+def current_rss() -> int:
+    """현재 프로세스의 RSS (바이트). /proc이 없으면 최대 RSS로 대신합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def model_nbytes(model) -> int:
+    """state_dict 텐서 크기의 합 (양자화된 packed 가중치 포함, 공유 텐서는 한 번만)."""
+    seen: set[int] = set()
+    total = 0
+
+    def visit(value) -> None:
+        nonlocal total
+        if isinstance(value, (tuple, list)):
+            for v in value:
+                visit(v)
+        elif hasattr(value, "element_size") and hasattr(value, "data_ptr"):
+            if value.data_ptr() not in seen:
+                seen.add(value.data_ptr())
+                total += value.numel() * value.element_size()
+
+    for value in model.state_dict().values():
+        visit(value)
+    return total
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    model: Any = None
+    nbytes: int = 0              # 마지막으로 올렸을 때의 크기 (내린 뒤에도 다음 로드 예상치로 사용)
+    last_used: float = 0.0
+    users: int = 0               # hold() 중인 호출 수 (0이 아니면 내리지 않음)
+    loads: int = 0
+    unloads: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelResidency:
+    """모델별 메모리 상주 관리자.
+
+    get()/hold()가 처음 불리면 loader로 올리고, 백그라운드 스레드가 주기적으로
+    유휴 시간과 프로세스 RSS를 확인해 사용 중이 아닌 모델을 내립니다. 내린 모델은 다음 사용 시 다시 올립니다.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = MISSION_SETTINGS.MODEL_IDLE_TTL,
+        ceiling_mb: int = MISSION_SETTINGS.MODEL_MEMORY_CEILING_MB,
+        check_interval: float = MISSION_SETTINGS.MODEL_RESIDENCY_CHECK_INTERVAL,
+    ) -> None:
+        self.idle_ttl = idle_ttl
+        self.ceiling = ceiling_mb * 1024 * 1024
+        self.check_interval = check_interval
+        self.events: deque[dict] = deque(maxlen=EVENT_HISTORY)
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._sweeper: threading.Thread | None = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        self._entries[name] = _Entry(loader)
+
+    # ─────────────────────────────────────────────
+    # 사용
+    # ─────────────────────────────────────────────
+    def get(self, name: str):
+        """모델을 반환합니다 (내려가 있으면 올림). 긴 작업 동안 쓸 거라면 hold()를 사용하세요."""
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is None:
+                self._make_room(entry.nbytes, exclude=name)
+                started = time.perf_counter()
+                entry.model = entry.loader()
+                entry.nbytes = model_nbytes(entry.model)
+                entry.loads += 1
+                self._record(name, "load", entry.nbytes, seconds=time.perf_counter() - started)
+                self._start_sweeper()
+            entry.last_used = time.monotonic()
+            return entry.model
+
+    @contextmanager
+    def hold(self, name: str) -> Iterator[Any]:
+        """블록 동안 모델이 내려가지 않도록 고정합니다."""
+        entry = self._entries[name]
+        with self._lock:
+            entry.users += 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    # ─────────────────────────────────────────────
+    # 내리기
+    # ─────────────────────────────────────────────
+    def unload(self, name: str, reason: str) -> bool:
+        """사용 중이 아니면 모델을 내립니다. 내렸으면 True."""
+        entry = self._entries[name]
+        # 다른 스레드가 올리는 중이면 건너뜀 (서로의 모델을 내리려다 교착되지 않도록)
+        if not entry.lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if entry.model is None or entry.users:
+                    return False
+                entry.model = None
+                entry.unloads += 1
+        finally:
+            entry.lock.release()
+        _release_memory()
+        self._record(name, "unload", entry.nbytes, reason=reason)
+        return True
+
+    def unload_idle(self, reason: str) -> int:
+        """사용 중이 아닌 모델을 모두 내립니다. 내린 모델 수를 반환합니다."""
+        return sum(self.unload(name, reason) for name in self._lru())
+
+    def sweep(self) -> None:
+        """유휴 TTL이 지난 모델을 내리고, RSS가 상한을 넘으면 오래 안 쓴 모델부터 내립니다."""
+        if self.idle_ttl:
+            now = time.monotonic()
+            for name in self._lru():
+                if now - self._entries[name].last_used >= self.idle_ttl:
+                    self.unload(name, "idle")
+        self._make_room(0)
+
+    def _make_room(self, incoming: int, exclude: str | None = None) -> None:
+        if not self.ceiling:
+            return
+        for name in self._lru():
+            if name == exclude or current_rss() + incoming <= self.ceiling:
+                continue
+            self.unload(name, "memory")
+
+    def _lru(self) -> list[str]:
+        """올라와 있고 사용 중이 아닌 모델, 오래 안 쓴 순."""
+        with self._lock:
+            idle = [(e.last_used, name) for name, e in self._entries.items() if e.model is not None and not e.users]
+        return [name for _, name in sorted(idle)]
+
+    def _start_sweeper(self) -> None:
+        if self._sweeper is not None or not (self.idle_ttl or self.ceiling):
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="model-residency", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("model residency sweep failed")
+
+    # ─────────────────────────────────────────────
+    # 상태 보고
+    # ─────────────────────────────────────────────
+    def _record(self, name: str, event: str, nbytes: int, **extra) -> None:
+        self.events.append({"time": time.time(), "model": name, "event": event, "bytes": nbytes, **extra})
+        logger.info("model %s %s (%.0f MB) %s", name, event, nbytes / 2**20, extra or "")
+
+    def resident(self) -> dict[str, bool]:
+        return {name: e.model is not None for name, e in self._entries.items()}
+
+    def resident_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values() if e.model is not None)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "resident_bytes": self.resident_bytes(),
+            "rss_bytes": current_rss(),
+            "ceiling_bytes": self.ceiling,
+            "idle_ttl": self.idle_ttl,
+            "models": {
+                name: {
+                    "resident": e.model is not None,
+                    "bytes": e.nbytes,
+                    "in_use": e.users,
+                    "idle_seconds": now - e.last_used if e.model is not None else None,
+                    "loads": e.loads,
+                    "unloads": e.unloads,
+                }
+                for name, e in self._entries.items()
+            },
+            "events": list(self.events),
+        }
+
+
+def _release_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+# 프로세스당 하나. 모델 loader는 generate_model이 import 될 때 등록됩니다.
+RESIDENCY = ModelResidency()
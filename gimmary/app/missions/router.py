@@ -7,19 +7,26 @@ from gimmary.app.auth.utils import get_current_user
 from gimmary.app.missions.schemes import (
   MissionCreateRequest, MissionUpdateRequest, MissionResponse,
   GroupMissionUpdateRequest, GroupMissionResponse, SubmissionResponse,
+  ReconstructionJobResponse, ReconstructionRequest,
 )
 from gimmary.database.connection import get_db_session
 from gimmary.database.models import (
-  Mission, GroupMission, GroupMember, TeamMember, Pictures, User, UserRole, MissionStatus
+  Mission, GroupMission, GroupMember, TeamMember, Pictures, User, UserRole, MissionStatus,
+  ReconstructionJob, JobKind,
 )
-from gimmary.app.missions.generate_model import generate_3d_model
-from fastapi import File, UploadFile
-from fastapi.responses import FileResponse
-from pathlib import Path
-import os
+from gimmary.app.missions.jobs import (
+  QueueFull, check_admission, enqueue_reconstruction, enqueue_verification, queue_position,
+)
+from gimmary.app.missions.artifacts import lod_urls, release_model, resolve_download
+from gimmary.app.missions.ingest import UploadRejected, ingest_path, ingest_upload, receive_upload, store_upload
+from gimmary.app.missions.storage import acquire, staging_dir
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+import math
 import uuid
-import subprocess
-import shutil
+import json
 import logging
 
 router = APIRouter(prefix="/missions", tags=["missions"])
@@ -27,38 +34,12 @@ router = APIRouter(prefix="/missions", tags=["missions"])
 logger = logging.getLogger(__name__)
 
 
-def _find_gltf_pipeline() -> list | None:
-  """Return command list to run gltf-pipeline, or None if not available.
-
-  Tries in order:
-  - executable on PATH (`gltf-pipeline`)
-  - `npx gltf-pipeline` if `npx` is available
-  - common global npm bin locations
-  """
-  # 1) direct on PATH
-  exe = shutil.which("gltf-pipeline")
-  if exe:
-    return [exe]
-
-  # 2) npx wrapper
-  npx = shutil.which("npx")
-  if npx:
-    return [npx, "gltf-pipeline"]
-
-  # 3) try common global locations
-  candidates = [
-    Path(os.path.expanduser("~/.npm-global/bin/gltf-pipeline")),
-    Path("/usr/local/bin/gltf-pipeline"),
-    Path("/usr/bin/gltf-pipeline"),
-  ]
-  for p in candidates:
-    try:
-      if p.exists():
-        return [str(p)]
-    except Exception:
-      continue
-
-  return None
+def _queue_full(e: QueueFull) -> HTTPException:
+  return HTTPException(
+    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+    detail=str(e),
+    headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+  )
 
 
 @router.post("/", response_model=MissionResponse)
@@ -94,6 +75,7 @@ def create_mission(
     points=mission.points,
     created_at=mission.created_at.isoformat(),
     model_url=mission.model_url,
+    lods=lod_urls(db, mission.model_url),
   )
 
 
@@ -113,6 +95,7 @@ def get_mission(
     points=mission.points,
     created_at=mission.created_at.isoformat() if mission.created_at else "",
     model_url=mission.model_url,
+    lods=lod_urls(db, mission.model_url),
   )
 
 
@@ -152,6 +135,7 @@ def update_mission(
     points=mission.points,
     created_at=mission.created_at.isoformat() if mission.created_at else "",
     model_url=mission.model_url,
+    lods=lod_urls(db, mission.model_url),
   )
 
 
@@ -173,6 +157,7 @@ def delete_mission(
   if not membership:
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only team admin can delete missions")
 
+  release_model(db, mission.model_url)
   db.delete(mission)
   db.commit()
 
@@ -244,11 +229,30 @@ def update_group_mission(
     status=gm.status,
   )
 
-@router.post("/{mission_id}/submit", response_model=SubmissionResponse)
+# 본문은 핸들러에서 직접 스트리밍으로 파싱하므로 (UploadFile을 쓰면 FastAPI가 먼저 전부 받아 둠) 스키마만 명시
+SUBMIT_REQUEST_BODY = {
+  "required": True,
+  "content": {
+    "multipart/form-data": {
+      "schema": {
+        "type": "object",
+        "required": ["file"],
+        "properties": {"file": {"type": "string", "format": "binary"}},
+      },
+    },
+  },
+}
+
+
+@router.post(
+  "/{mission_id}/submit",
+  response_model=SubmissionResponse,
+  openapi_extra={"requestBody": SUBMIT_REQUEST_BODY},
+)
 async def submit_group_mission(
   mission_id: int,
   group_id: int,
-  file: UploadFile = File(...),
+  request: Request,
   current_user: User = Depends(get_current_user),
   db: Annotated[Session, Depends(get_db_session)] = None,
 ):
@@ -272,20 +276,53 @@ async def submit_group_mission(
   if not membership:
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can submit photos")
 
-  # 파일 저장
-  uploads_dir = Path("uploads") / f"group_mission_{gm.id}"
-  os.makedirs(uploads_dir, exist_ok=True)
-  suffix = Path(file.filename).suffix or ""
-  filename = f"{current_user.id}_{uuid.uuid4().hex}{suffix}"
-  dest = uploads_dir / filename
-  contents = await file.read()
-  dest.write_bytes(contents)
+  # 이 제출로 모두 제출하게 되면 재구성 작업이 들어가므로, 대기열이 가득 찼으면 파일을 받기 전에 거절
+  total_members = db.query(GroupMember).filter(GroupMember.group_id == group_id).count()
+  submitted_users = db.query(Pictures.user_id).filter(Pictures.group_mission_id == gm.id).distinct().count()
+  already_submitted = db.query(Pictures).filter(
+    Pictures.group_mission_id == gm.id,
+    Pictures.user_id == current_user.id,
+  ).first() is not None
+  if total_members > 0 and submitted_users + (0 if already_submitted else 1) >= total_members:
+    mission = db.query(Mission).filter(Mission.id == mission_id).first()
+    try:
+      check_admission(db, mission.team_id if mission else None, count=2 if MISSION_SETTINGS.PREVIEW_DEADLINE > 0 else 1)
+    except QueueFull as e:
+      raise _queue_full(e)
+
+  # 파일 수신: 본문을 받는 대로 파싱해 임시 파일에 쓰면서 해시를 계산하고, 크기/형식이 맞으면 제자리로 옮김
+  try:
+    staged, content_hash = await receive_upload(request, "file", staging_dir(), f"{current_user.id}_{uuid.uuid4().hex}")
+  except UploadRejected as e:
+    raise HTTPException(status_code=e.status_code, detail=str(e))
+
+  # 한 번만 디코딩해 방향/해상도를 정규화하고 모델별 입력을 업로드 옆에 저장 (이벤트 루프 밖에서)
+  try:
+    content_hash = await run_in_threadpool(ingest_upload, staged, content_hash=content_hash)
+  except Exception:
+    logger.exception("failed to ingest upload %s", staged)
+    staged.unlink(missing_ok=True)
+    ingest_path(staged).unlink(missing_ok=True)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file is not a readable image")
+
+  # 내용 주소 저장소로 옮김 (같은 사진은 한 번만 저장)
+  ref = await run_in_threadpool(store_upload, db, staged, content_hash)
 
   # Pictures 레코드 생성 (누가 제출했는지 기록)
-  pic = Pictures(group_mission_id=gm.id, user_id=current_user.id, url=str(dest), uploaded_at=datetime.utcnow())
+  pic = Pictures(
+    group_mission_id=gm.id,
+    user_id=current_user.id,
+    url=ref,
+    content_hash=content_hash,
+    uploaded_at=datetime.utcnow(),
+  )
   db.add(pic)
+  acquire(db, ref)
   db.commit()
 
+  # 업로드마다 기존 사진들과 대조 (결과는 작업 상태의 matched로 확인)
+  verify_job = enqueue_verification(db, gm.id, mission_id, pic.id)
+
   # 그룹 멤버 수와 제출한 고유 유저 수 비교
   total_members = db.query(GroupMember).filter(GroupMember.group_id == group_id).count()
   submitted_users = db.query(Pictures.user_id).filter(Pictures.group_mission_id == gm.id).distinct().count()
@@ -297,104 +334,142 @@ async def submit_group_mission(
     "submitted_users": submitted_users,
     "model_generated": None,
     "download_url": None,
+    "verify_job_id": verify_job.id,
     "log": None,
     "error": None,
   }
 
   completed = False
 
-  # 모두 제출했으면 모델 생성
+  # 모두 제출했으면 모델 생성 작업을 큐에 넣고 바로 응답
   if submitted_users >= total_members and total_members > 0:
     completed = True
-    # 이미지 경로 수집
-    pics = db.query(Pictures).filter(Pictures.group_mission_id == gm.id).all()
-    image_paths = [p.url for p in pics]
     gm.status = MissionStatus.SUCCESS.value
     db.commit()
 
-    try:
-      gen = generate_3d_model(image_paths, use_verify=True)
-      details["log"] = gen.get("log", "")
-      if gen.get("success") and gen.get("mesh_path"):
-        downloads_dir = Path("downloads")
-        downloads_dir.mkdir(parents=True, exist_ok=True)
-        dest_name = f"model_{gm.id}_{uuid.uuid4().hex}.glb"
-        final_path = downloads_dir / dest_name
-        Path(gen["mesh_path"]).replace(final_path)
-
-        # 시도: gltf-pipeline을 사용해 Draco 압축 수행
-        compressed_name = f"model_{gm.id}_{uuid.uuid4().hex}_draco.glb"
-        compressed_path = downloads_dir / compressed_name
-        compression_ok = False
-        try:
-          cmd_prefix = _find_gltf_pipeline()
-          if not cmd_prefix:
-            raise FileNotFoundError("gltf-pipeline executable not found")
-          cmd = cmd_prefix + ["-i", str(final_path), "-o", str(compressed_path), "-d"]
-          res = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=120)
-          if compressed_path.exists():
-            compression_ok = True
-            # 원본 삭제(안전하게 시도)
-            try:
-              final_path.unlink()
-            except Exception:
-              pass
-            used_name = compressed_name
-            # 로그에 실행 결과 추가
-            details["log"] = (details.get("log", "") + "\n" + res.stdout).strip()
-          else:
-            used_name = dest_name
-        except Exception as e:
-          # 압축 실패하면 원본 사용, 로그에 남김
-          logger.exception("gltf-pipeline compression failed during generation")
-          details["log"] = (details.get("log", "") + "\nCompression failed: " + str(e)).strip()
-          used_name = dest_name
-
-        # 상태 업데이트: 미션 모델 URL 저장
-        mission = db.query(Mission).filter(Mission.id == mission_id).first()
-        if mission:
-          mission.model_url = f"/missions/downloads/{used_name}"
-        db.commit()
-
-        details.update({
-          "model_generated": True,
-          "download_url": f"/missions/downloads/{used_name}",
-        })
-      else:
-        details["model_generated"] = False
-    except Exception as e:
-      details["model_generated"] = False
-      details["error"] = str(e)
+    # 미리보기를 켜 두면 빠른 모델을 먼저 만들고 이어서 설정된 품질로 다시 만듦
+    # 대기열 상한은 파일을 받기 전에 확인했음
+    preview = None
+    if MISSION_SETTINGS.PREVIEW_DEADLINE > 0:
+      preview = enqueue_reconstruction(db, gm.id, mission_id, deadline=MISSION_SETTINGS.PREVIEW_DEADLINE, admit=False)
+      details["preview_job_id"] = preview.id
+    job = enqueue_reconstruction(db, gm.id, mission_id, admit=False)
+    details["job_id"] = job.id
+    # 제출자가 처음 받게 될 모델(미리보기가 있으면 미리보기)의 대기 순번
+    position = queue_position(db, (preview or job).id)
+    if position:
+      details["queue_position"], details["estimated_wait"] = position
 
   return {"completed": completed, "details": details}
 
 
+@router.post("/{mission_id}/reconstruct", response_model=ReconstructionJobResponse)
+def request_reconstruction(
+  mission_id: int,
+  body: ReconstructionRequest,
+  current_user: User = Depends(get_current_user),
+  db: Annotated[Session, Depends(get_db_session)] = None,
+):
+  # 다른 품질(예: 미리보기 이후 high)로 모델을 다시 만드는 작업을 큐에 넣음
+  gm = db.query(GroupMission).filter(
+    GroupMission.mission_id == mission_id,
+    GroupMission.group_id == body.group_id,
+  ).first()
+  if not gm:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group mission not found")
+
+  membership = db.query(GroupMember).filter(
+    GroupMember.group_id == body.group_id,
+    GroupMember.user_id == current_user.id
+  ).first()
+  if not membership:
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can request reconstruction")
+
+  try:
+    job = enqueue_reconstruction(db, gm.id, mission_id, quality=body.quality, deadline=body.deadline)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+  except QueueFull as e:
+    raise _queue_full(e)
+  return get_reconstruction_job(job.id, db)
+
+
+@router.get("/jobs/{job_id}", response_model=ReconstructionJobResponse)
+def get_reconstruction_job(
+  job_id: int,
+  db: Annotated[Session, Depends(get_db_session)] = None,
+):
+  job = db.query(ReconstructionJob).filter(ReconstructionJob.id == job_id).first()
+  if not job:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+  matched = None
+  if job.picture_id is not None:
+    pic = db.query(Pictures).filter(Pictures.id == job.picture_id).first()
+    matched = pic.matched if pic else None
+
+  position = queue_position(db, job.id) if job.kind == JobKind.RECONSTRUCT.value else None
+
+  return ReconstructionJobResponse(
+    id=job.id,
+    group_mission_id=job.group_mission_id,
+    mission_id=job.mission_id,
+    kind=job.kind,
+    picture_id=job.picture_id,
+    matched=matched,
+    quality=job.quality,
+    deadline=job.deadline,
+    image_count=job.image_count,
+    status=job.status,
+    stage=job.stage,
+    queue_position=position[0] if position else None,
+    estimated_wait=position[1] if position else None,
+    attempts=job.attempts or 0,
+    created_at=job.created_at.isoformat() if job.created_at else "",
+    started_at=job.started_at.isoformat() if job.started_at else None,
+    finished_at=job.finished_at.isoformat() if job.finished_at else None,
+    timings=json.loads(job.timings) if job.timings else {},
+    download_url=job.download_url,
+    log=job.log,
+    error=job.error,
+  )
+
+
+# 해시+변형 이름은 내용이 바뀌지 않으므로 1년 캐시, 그 외(변형 협상 URL, 예전 파일)는 매번 ETag로 재검증
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+  # If-None-Match는 약한 비교: W/ 접두사를 무시하고 목록 중 하나라도 같으면 일치
+  tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+  return "*" in tags or etag in tags
+
+
 @router.get("/downloads/{filename}")
-def download_model(filename: str):
-  downloads_dir = Path("downloads")
-  path = downloads_dir / filename
-  if not path.exists():
+def download_model(
+  filename: str,
+  request: Request,
+  variant: str | None = None,
+  db: Annotated[Session, Depends(get_db_session)] = None,
+):
+  # 변형(Draco 등)은 생성 시 한 번만 만들어 두므로 여기서는 기록된 파일을 그대로 보냄
+  download = resolve_download(db, filename, variant)
+  if download is None:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-  # 이미 압축된 파일은 재압축 방지
-  is_already_draco = "_draco" in filename
-  if not is_already_draco:
-    compressed_name = f"{Path(filename).stem}_draco.glb"
-    compressed_path = downloads_dir / compressed_name
-    try:
-      # gltf-pipeline으로 Draco 압축 시도 (타임아웃 120s)
-      cmd_prefix = _find_gltf_pipeline()
-      if cmd_prefix:
-        cmd = cmd_prefix + ["-i", str(path), "-o", str(compressed_path), "-d"]
-        subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=120)
-        if compressed_path.exists():
-          # 압축 성공 시 압축 파일을 전송
-          return FileResponse(compressed_path, media_type="model/gltf-binary", filename=compressed_name)
-      else:
-        logger.debug("gltf-pipeline not found; skipping compression on download")
-    except Exception as e:
-      # 압축 실패 시 원본 파일로 폴백
-      logger.exception("gltf-pipeline compression failed during download")
-      pass
-
-  return FileResponse(path, media_type="model/gltf-binary", filename=filename)
\ No newline at end of file
+  headers = {"cache-control": IMMUTABLE_CACHE_CONTROL if download.immutable else REVALIDATE_CACHE_CONTROL}
+  if download.etag:
+    headers["etag"] = f'"{download.etag}"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["etag"]):
+      return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+  if MISSION_SETTINGS.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+    # 본문은 nginx가 sendfile로 보냄 (Range/206도 nginx가 처리)
+    headers["x-accel-redirect"] = MISSION_SETTINGS.DOWNLOAD_ACCEL_REDIRECT_PREFIX + download.internal
+    headers["content-disposition"] = f'attachment; filename="{download.name}"'
+    return Response(media_type="model/gltf-binary", headers=headers)
+
+  # FileResponse가 Range/If-Range(206)를 처리하고, 서버가 pathsend를 지원하면 파일 경로만 넘김
+  return FileResponse(download.path, media_type="model/gltf-binary", filename=download.name, headers=headers)
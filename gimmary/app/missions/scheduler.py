@@ -0,0 +1,53 @@
+import math
+from collections import deque
+from datetime import datetime
+from statistics import median
+from typing import NamedTuple
+
+# 재구성 작업의 팀별 공정 분배. 워커가 다음 작업을 고를 때(jobs.claim_next_job)와
+# 제출자에게 대기 순번을 알려줄 때 같은 규칙을 씁니다. DB 없이 계산하는 순수 함수만 둡니다.
+
+
+class QueuedJob(NamedTuple):
+    id: int
+    team_id: int | None
+    available_at: datetime
+
+
+def team_priority(running: dict[int | None, int], team_id: int | None, head: QueuedJob) -> tuple:
+    """실행 중인 작업이 적은 팀이 먼저, 같으면 가장 오래 기다린 작업의 팀이 먼저."""
+    return running.get(team_id, 0), head.available_at, head.id
+
+
+def fair_share_order(queued: list[QueuedJob], running: dict[int | None, int]) -> list[int]:
+    """대기 중인 작업을 실행될 순서대로 정렬한 id 목록.
+
+    한 작업을 고를 때마다 그 팀의 실행 수를 하나 늘린다고 보고 다시 고르므로,
+    팀들이 번갈아 가며 슬롯을 얻습니다 (큰 팀이 먼저 몰아넣은 작업이 다른 팀을 막지 않음).
+    """
+    queues: dict[int | None, deque[QueuedJob]] = {}
+    for job in sorted(queued, key=lambda j: (j.available_at, j.id)):
+        queues.setdefault(job.team_id, deque()).append(job)
+
+    load = dict(running)
+    order = []
+    while queues:
+        team_id = min(queues, key=lambda t: team_priority(load, t, queues[t][0]))
+        order.append(queues[team_id].popleft().id)
+        load[team_id] = load.get(team_id, 0) + 1
+        if not queues[team_id]:
+            del queues[team_id]
+    return order
+
+
+def typical_duration(durations: list[float], default: float) -> float:
+    """최근 작업 소요 시간(초)의 중앙값. 기록이 없으면 default."""
+    return median(durations) if durations else default
+
+
+def estimate_wait(position: int, slots: int, duration: float) -> float:
+    """position번째(1부터) 대기 작업이 시작되기까지의 예상 시간(초).
+
+    slots개 슬롯이 모두 차 있고, 한 건이 끝날 때마다 앞에서부터 하나씩 들어간다고 봅니다.
+    """
+    return math.ceil(position / max(slots, 1)) * duration
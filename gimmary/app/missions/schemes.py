@@ -21,6 +21,8 @@ class MissionResponse(BaseModel):
   points: int
   created_at: str
   model_url: str | None = None
+  # LOD 이름 → 다운로드 URL (작은 단계부터, 마지막이 원본 "full")
+  lods: dict[str, str] = {}
 
 # ── GroupMission (그룹별 달성 상태) ─────────────────
 
@@ -41,10 +43,46 @@ class SubmissionDetails(BaseModel):
   submitted_users: int
   model_generated: bool | None = None
   download_url: str | None = None
+  job_id: int | None = None
+  preview_job_id: int | None = None
+  verify_job_id: int | None = None
+  queue_position: int | None = None  # 재구성 작업의 대기 순번 (1부터)
+  estimated_wait: float | None = None  # 시작까지 예상 시간(초)
   log: str | None = None
   error: str | None = None
 
 
 class SubmissionResponse(BaseModel):
   completed: bool
-  details: SubmissionDetails
\ No newline at end of file
+  details: SubmissionDetails
+
+
+# ── 3D 재구성 작업 상태 ─────────────────
+class ReconstructionRequest(BaseModel):
+  group_id: int
+  quality: str | None = None  # 'preview', 'standard', 'high'
+  deadline: float | None = None  # 초. quality 없이 주면 이 시간 안에 끝날 가장 높은 품질
+
+
+class ReconstructionJobResponse(BaseModel):
+  id: int
+  group_mission_id: int
+  mission_id: int
+  kind: str
+  picture_id: int | None = None
+  matched: bool | None = None
+  quality: str | None = None
+  deadline: float | None = None
+  image_count: int | None = None
+  status: str
+  stage: str | None = None
+  queue_position: int | None = None  # 대기 중인 재구성 작업의 순번 (1부터)
+  estimated_wait: float | None = None  # 시작까지 예상 시간(초)
+  attempts: int = 0
+  created_at: str
+  started_at: str | None = None
+  finished_at: str | None = None
+  timings: dict[str, float] = {}
+  download_url: str | None = None
+  log: str | None = None
+  error: str | None = None
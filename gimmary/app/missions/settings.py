@@ -0,0 +1,111 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from gimmary.settings import SETTINGS
+
+
+class MissionSettings(BaseSettings):
+    # API 프로세스 안에서 큐를 비우는 워커 스레드 수 (0이면 별도 워커 프로세스만 사용).
+    # 1 이상이면 첫 작업 처리 시 API 프로세스에도 torch 등 ML 스택이 올라옵니다.
+    EMBEDDED_WORKERS: int = 1
+    # 재구성 작업 재시도/하트비트 (초 단위)
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 30.0
+    JOB_HEARTBEAT_INTERVAL: float = 10.0
+    JOB_STALE_AFTER: float = 120.0
+    JOB_POLL_INTERVAL: float = 2.0
+    # 재구성 작업 입장 제어: 동시에 실행하는 재구성 수 상한 (전체/팀별, 0이면 제한 없음)과
+    # 대기열 상한 (전체/팀별, 0이면 제한 없음). 대기열이 차면 새 요청은 429 + Retry-After로 거절.
+    # 대기 중인 작업은 실행 중인 작업이 적은 팀부터 번갈아 실행합니다
+    JOB_MAX_RUNNING: int = 0
+    JOB_MAX_RUNNING_PER_TEAM: int = 0
+    JOB_MAX_QUEUED: int = 200
+    JOB_MAX_QUEUED_PER_TEAM: int = 20
+    # 완료 기록이 없을 때 쓰는 재구성 1건의 예상 소요 시간 (초, 대기 시간/Retry-After 추정용)
+    JOB_DEFAULT_DURATION: float = 300.0
+    # DINOv2 임베딩 추출 미니배치 크기 (1 이상)
+    DINO_BATCH_SIZE: int = Field(8, ge=1)
+    # 동시에 확인할 LoFTR 후보 쌍 수 (한 번의 forward로 배치 처리, 1 이상)
+    LOFTR_BATCH_SIZE: int = Field(4, ge=1)
+    # DUSt3R 페어 추론 배치 크기 산정 (가용 메모리 기준)
+    DUST3R_PAIR_MEMORY_MB: int = 600
+    DUST3R_MAX_BATCH_SIZE: int = 8
+    # DUSt3R 메모리 제한 모드 (MB, 0이면 끔): 페어를 나눠서 추론하고 포인트맵을 DUST3R_SPILL_DIR의
+    # 메모리 맵 파일로 내려, 프로세스 RSS가 이 값을 넘지 않게 합니다. 넘을 수밖에 없으면 재구성을 실패 처리
+    DUST3R_MEMORY_BUDGET_MB: int = 0
+    DUST3R_SPILL_DIR: str = "cache/spill"
+    # 모두 제출했을 때 만드는 모델의 품질 단계. PREVIEW_DEADLINE(초)이 0보다 크면
+    # 그 시간 안에 끝날 단계로 미리보기 모델을 먼저 만들고 이어서 이 품질로 다시 만듭니다.
+    RECONSTRUCT_QUALITY: str = "standard"
+    PREVIEW_DEADLINE: float = 0.0
+    # 재구성에 넣을 최대 사진 수 (0이면 품질 단계의 max_images)와
+    # 이보다 DINOv2 유사도가 높은 사진은 거의 같은 사진으로 보고 제외
+    VIEW_SELECTION_MAX_IMAGES: int = 0
+    NEAR_DUPLICATE_SIMILARITY: float = 0.97
+    # 전역 정렬 조기 종료: 최근 ALIGN_WINDOW회 동안 loss의 상대 개선이 ALIGN_REL_TOL 미만이면 멈춤.
+    # ALIGN_MAX_ITERS는 품질 단계와 무관한 반복 상한, ALIGN_TIME_BUDGET은 초 단위 상한(0이면 제한 없음)
+    ALIGN_MAX_ITERS: int = 500
+    ALIGN_MIN_ITERS: int = 30
+    ALIGN_WINDOW: int = 10
+    ALIGN_REL_TOL: float = 1e-3
+    ALIGN_TIME_BUDGET: float = 120.0
+    # 모델 가중치 캐시 디렉터리와 오프라인 모드 (True면 네트워크로 내려받지 않음)
+    WEIGHTS_DIR: str = "weights"
+    OFFLINE: bool = False
+    # 시작 시 미리 올려둘 모델 ("dino", "loftr", "dust3r"). 비어 있으면 첫 사용 시 로드
+    PRELOAD_MODELS: list[str] = []
+    # 모델 상주 관리: MODEL_IDLE_TTL초 동안 안 쓴 모델을 내리고(0이면 계속 유지),
+    # 프로세스 RSS가 MODEL_MEMORY_CEILING_MB를 넘으면 사용 중이 아닌 모델을 오래된 순으로 내립니다(0이면 제한 없음).
+    # 내린 모델은 다음 사용 시 다시 로드
+    MODEL_IDLE_TTL: float = 0.0
+    MODEL_MEMORY_CEILING_MB: int = 0
+    MODEL_RESIDENCY_CHECK_INTERVAL: float = 30.0
+    # 전용 추론 프로세스 수 (0이면 작업 워커 스레드 안에서 바로 실행)와
+    # 프로세스당 torch 스레드 수 (0이면 CPU 코어 수 / 프로세스 수)
+    INFERENCE_PROCESSES: int = 0
+    INFERENCE_TORCH_THREADS: int = 0
+    # 추론 정밀도 프로파일 ("fp32", "bf16", "int8")과 torch.compile 사용 여부.
+    # fp32 외의 프로파일은 scripts/check_inference_profile.py로 정확도를 확인한 뒤 켭니다.
+    INFERENCE_PROFILE: str = "fp32"
+    INFERENCE_COMPILE: bool = False
+    # 동일 피사체 검증(DINOv2/LoFTR) 실행 백엔드: "torch" 또는 "onnx".
+    # onnx는 `uv sync --extra onnx`(onnxruntime)와 `python -m gimmary.app.missions.generate_model --export-onnx`로
+    # 만든 모델이 필요하며, 없으면 torch로 대체
+    VERIFY_BACKEND: str = "torch"
+    # 이미지 해시 쌍 기반 DUSt3R 페어 예측(포인트맵/신뢰도)과 카메라 포즈 캐시
+    DUST3R_CACHE_ENABLED: bool = True
+    DUST3R_CACHE_PATH: str = "cache/dust3r.sqlite3"
+    DUST3R_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    # 재구성 후 크기 예산별 LOD 메시(lod.LOD_LEVELS)도 만들어 미션 응답에 URL을 함께 내려줄지 여부
+    MESH_LOD_ENABLED: bool = True
+    # 모델 다운로드를 앞단 nginx가 sendfile로 보내게 할 내부 경로 접두사 (예: "/_downloads/").
+    # 뒤에 저장소 키(ab/cd/<해시>.glb)가 붙으므로 STORAGE_ROOT/blobs를 가리키게 합니다 (예전 파일은 downloads/의 파일 이름).
+    # 비어 있으면 앱이 직접 보냄 (ASGI 서버가 pathsend를 지원하면 그쪽에서 zero-copy 전송)
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX: str = ""
+    # 업로드 사진/생성 모델 저장소: "local"(STORAGE_ROOT/blobs 아래 해시 샤딩 디렉터리) 또는
+    # "s3"(S3 호환 객체 저장소, `uv sync --extra s3`로 boto3 설치. STORAGE_ROOT/cache에 내려받은 파일을 둠).
+    # 참조가 없어진 파일은 STORAGE_GC_GRACE초 뒤에 워커가 STORAGE_GC_INTERVAL초마다 지웁니다
+    STORAGE_BACKEND: str = "local"
+    STORAGE_ROOT: str = "storage"
+    STORAGE_S3_BUCKET: str = ""
+    STORAGE_S3_PREFIX: str = ""
+    STORAGE_S3_ENDPOINT_URL: str = ""
+    STORAGE_GC_INTERVAL: float = 600.0
+    STORAGE_GC_GRACE: float = 24 * 60 * 60
+    # 업로드 사진 최대 크기 (바이트, 넘으면 본문을 끝까지 받지 않고 413)
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024
+    # 업로드 시 사진 긴 변 최대 길이 (넘으면 줄여서 저장)
+    INGEST_MAX_SIDE: int = 2048
+    # 이미지 해시 기반 임베딩/LoFTR 매칭 캐시
+    FEATURE_CACHE_ENABLED: bool = True
+    FEATURE_CACHE_PATH: str = "cache/features.sqlite3"
+    FEATURE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    model_config = SettingsConfigDict(
+        case_sensitive=False,
+        env_prefix="MISSION_",
+        env_file=SETTINGS.env_file,
+        extra='ignore'
+    )
+
+
+MISSION_SETTINGS = MissionSettings()
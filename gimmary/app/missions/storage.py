@@ -0,0 +1,323 @@
+import errno
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Protocol
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from gimmary.database.models import StoredBlob
+
+logger = logging.getLogger(__name__)
+
+# 업로드 사진과 생성된 모델을 내용(SHA-256) 주소로 저장합니다. 키는 `ab/cd/<해시><확장자>`로
+# 해시 앞 두 바이트로 샤딩해 디렉터리 하나에 파일이 몰리지 않게 하고, 같은 내용은 한 번만 저장합니다.
+# 파일이 몇 개의 DB 행(사진, 미션 모델, 모델 변형)에서 쓰이는지는 stored_blobs.refcount로 세고,
+# 참조가 없어진 뒤 STORAGE_GC_GRACE초가 지나면 워커가 지웁니다.
+
+# DB에 저장하는 참조 (Pictures.url, ModelArtifact.filename). 이 접두사가 없으면 예전의 로컬 경로
+BLOB_REF_PREFIX = "blob:"
+_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_key(content_hash: str, suffix: str) -> str:
+    if not _HASH.match(content_hash):
+        raise ValueError(f"invalid content hash {content_hash!r}")
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{suffix}"
+
+
+def blob_ref(key: str) -> str:
+    return BLOB_REF_PREFIX + key
+
+
+def ref_key(ref: str | None) -> str | None:
+    """blob 참조의 키. 예전 경로나 None이면 None."""
+    if ref and ref.startswith(BLOB_REF_PREFIX):
+        return ref[len(BLOB_REF_PREFIX):]
+    return None
+
+
+def staging_dir() -> Path:
+    """저장소에 넣기 전 파일을 쓰는 임시 디렉터리 (저장소와 같은 파일 시스템이라 옮기기가 원자적)."""
+    path = Path(MISSION_SETTINGS.STORAGE_ROOT) / "tmp"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ─────────────────────────────────────────────
+# 저장소 백엔드
+# ─────────────────────────────────────────────
+class BlobStore(Protocol):
+    """내용 주소 파일 저장소. 키는 blob_key()로 만들고, 같은 키에는 항상 같은 내용이 들어갑니다."""
+
+    name: str
+
+    def put(self, src: Path, key: str) -> bool:
+        """src를 key로 옮깁니다 (src는 없어짐). 이미 있으면 새로 쓰지 않고 False."""
+        ...
+
+    def exists(self, key: str) -> bool:
+        ...
+
+    def local_path(self, key: str) -> Path:
+        """읽을 수 있는 로컬 파일 경로 (원격이면 캐시로 내려받음). 없으면 FileNotFoundError."""
+        ...
+
+    def delete(self, key: str) -> None:
+        """파일과 같은 해시로 시작하는 로컬 파생 파일(업로드 옆 .ingest.npz 등)을 지웁니다."""
+        ...
+
+
+def _move(src: Path, dest: Path) -> None:
+    """같은 파일 시스템이면 rename, 아니면 같은 디렉터리의 임시 파일로 복사한 뒤 rename."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+        src.unlink()
+
+
+def _unlink_derived(path: Path) -> None:
+    for derived in path.parent.glob(f"{path.name[:64]}.*"):
+        derived.unlink(missing_ok=True)
+
+
+class LocalBlobStore:
+    """root 아래 샤딩된 디렉터리에 저장합니다."""
+
+    name = "local"
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, src: Path, key: str) -> bool:
+        dest = self._path(key)
+        if dest.exists():
+            src.unlink(missing_ok=True)
+            return False
+        _move(src, dest)
+        return True
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def local_path(self, key: str) -> Path:
+        path = self._path(key)
+        if not path.is_file():
+            raise FileNotFoundError(path)
+        return path
+
+    def delete(self, key: str) -> None:
+        _unlink_derived(self._path(key))
+
+
+class S3BlobStore:
+    """S3 호환 객체 저장소. 읽을 때는 cache_root 아래에 내려받아 둔 파일을 씁니다.
+
+    client는 boto3 S3 클라이언트와 같은 upload_file/download_file/head_object/delete_object를 제공하면 됩니다.
+    """
+
+    name = "s3"
+
+    def __init__(self, client, bucket: str, cache_root: str | Path, prefix: str = "") -> None:
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_root = Path(cache_root)
+
+    def _object(self, key: str) -> str:
+        return self.prefix + key
+
+    def _cache(self, key: str) -> Path:
+        return self.cache_root / key
+
+    def put(self, src: Path, key: str) -> bool:
+        created = not self.exists(key)
+        if created:
+            self.client.upload_file(str(src), self.bucket, self._object(key))
+        # 방금 쓴 파일은 캐시로 남겨 같은 호스트에서 다시 내려받지 않게 함
+        if self._cache(key).exists():
+            src.unlink(missing_ok=True)
+        else:
+            _move(src, self._cache(key))
+        return created
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object(key))
+        except Exception as e:
+            if _is_missing(e):
+                return False
+            raise
+        return True
+
+    def local_path(self, key: str) -> Path:
+        path = self._cache(key)
+        if path.is_file():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            self.client.download_file(self.bucket, self._object(key), str(tmp))
+            os.replace(tmp, path)
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(f"s3://{self.bucket}/{self._object(key)}") from e
+            raise
+        finally:
+            tmp.unlink(missing_ok=True)
+        return path
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object(key))
+        _unlink_derived(self._cache(key))
+
+
+def _is_missing(e: Exception) -> bool:
+    """botocore ClientError의 404/NoSuchKey."""
+    code = getattr(e, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """MISSION_STORAGE_BACKEND에 따라 저장소를 만듭니다."""
+    global _store
+    if _store is None:
+        root = Path(MISSION_SETTINGS.STORAGE_ROOT)
+        if MISSION_SETTINGS.STORAGE_BACKEND == "local":
+            _store = LocalBlobStore(root / "blobs")
+        elif MISSION_SETTINGS.STORAGE_BACKEND == "s3":
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=MISSION_SETTINGS.STORAGE_S3_ENDPOINT_URL or None)
+            _store = S3BlobStore(client, MISSION_SETTINGS.STORAGE_S3_BUCKET, root / "cache", MISSION_SETTINGS.STORAGE_S3_PREFIX)
+        else:
+            raise ValueError(f"unknown storage backend {MISSION_SETTINGS.STORAGE_BACKEND!r}")
+    return _store
+
+
+def local_file(ref: str) -> Path:
+    """DB에 저장된 참조를 읽을 수 있는 로컬 경로로 바꿉니다. 예전 경로는 그대로 씁니다."""
+    key = ref_key(ref)
+    return get_blob_store().local_path(key) if key else Path(ref)
+
+
+# ─────────────────────────────────────────────
+# 참조 수
+# ─────────────────────────────────────────────
+def put_blob(session: Session, src: Path, content_hash: str, suffix: str) -> str:
+    """src를 저장소에 넣고 blob 참조를 반환합니다. 같은 내용이 이미 있으면 src를 지우고 기존 파일을 씁니다.
+
+    참조가 붙기 전에 GC가 지우지 않도록 행의 유예 시각을 지금으로 갱신한 뒤 커밋합니다.
+    참조하는 행을 만들 때 같은 트랜잭션에서 acquire()를 부르세요.
+    """
+    key = blob_key(content_hash, suffix)
+    size = src.stat().st_size
+    for _ in range(2):
+        # GC가 이 행을 잠그고 지우는 중이면 끝날 때까지 기다렸다가 새로 만듦
+        blob = session.query(StoredBlob).filter(StoredBlob.key == key).with_for_update().first()
+        if blob is None:
+            blob = StoredBlob(key=key, size=size, refcount=0, created_at=datetime.utcnow())
+            session.add(blob)
+        blob.released_at = datetime.utcnow()
+        try:
+            session.commit()
+            break
+        except IntegrityError:
+            # 다른 요청이 같은 내용을 동시에 저장함
+            session.rollback()
+    get_blob_store().put(src, key)
+    return blob_ref(key)
+
+
+def acquire(session: Session, ref: str | None) -> None:
+    """참조 수를 하나 늘립니다 (커밋은 호출 측에서). 예전 경로면 아무 것도 하지 않습니다."""
+    key = ref_key(ref)
+    if key:
+        session.query(StoredBlob).filter(StoredBlob.key == key).update(
+            {"refcount": StoredBlob.refcount + 1, "released_at": None}, synchronize_session=False
+        )
+
+
+def release(session: Session, ref: str | None) -> None:
+    """참조 수를 하나 줄입니다 (커밋은 호출 측에서). 0이 되면 그때부터 GC 유예를 셉니다."""
+    key = ref_key(ref)
+    if key:
+        session.query(StoredBlob).filter(StoredBlob.key == key, StoredBlob.refcount > 0).update(
+            {"refcount": StoredBlob.refcount - 1, "released_at": datetime.utcnow()}, synchronize_session=False
+        )
+
+
+def collect_garbage(
+    session: Session,
+    grace: float = MISSION_SETTINGS.STORAGE_GC_GRACE,
+    limit: int = 100,
+    on_delete: Callable[[Session, str], None] | None = None,
+) -> int:
+    """참조가 없어진 지 grace초가 지난 파일을 최대 limit개 지웁니다. 지운 수를 반환합니다.
+
+    on_delete(session, ref)는 파일을 지우기 전에 그 파일에 딸린 행을 정리할 때 씁니다 (같은 트랜잭션).
+    행 삭제를 먼저 커밋하고 파일은 그 뒤에 지웁니다. 중간에 실패하면 고아 파일이 남을 뿐 DB가 없는 파일을 가리키지는 않습니다.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace)
+    blobs = (
+        session.query(StoredBlob)
+        .filter(StoredBlob.refcount <= 0, StoredBlob.released_at < cutoff)
+        .order_by(StoredBlob.released_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    collected = [(blob.key, blob.size or 0) for blob in blobs]
+    for blob in blobs:
+        if on_delete is not None:
+            on_delete(session, blob_ref(blob.key))
+        session.delete(blob)
+    session.commit()
+
+    store = get_blob_store()
+    for key, _ in collected:
+        # 커밋 뒤 같은 내용이 다시 올라와 행이 생겼으면 그 파일을 쓰므로 남김.
+        # 잠금 읽기가 (없는 키라도) 다시 만드는 INSERT를 파일을 지울 때까지 막음
+        if session.query(StoredBlob.id).filter(StoredBlob.key == key).with_for_update().first() is None:
+            store.delete(key)
+        session.commit()
+    if collected:
+        logger.info("collected %d unreferenced blobs (%d bytes)", len(collected), sum(size for _, size in collected))
+    return len(collected)
+
+
+def sweep_staging(max_age: float = MISSION_SETTINGS.STORAGE_GC_GRACE) -> int:
+    """작업이 중간에 죽어 남은 임시 파일을 지웁니다. 지운 수를 반환합니다."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in staging_dir().iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
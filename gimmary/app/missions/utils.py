@@ -0,0 +1,61 @@
+import hashlib
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+
+
+def sha256_file(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def find_gltf_pipeline() -> list | None:
+    """Return command list to run gltf-pipeline, or None if not available.
+
+    Tries in order:
+    - executable on PATH (`gltf-pipeline`)
+    - `npx gltf-pipeline` if `npx` is available
+    - common global npm bin locations
+
+    The result is cached for the life of the process.
+    """
+    # 1) direct on PATH
+    exe = shutil.which("gltf-pipeline")
+    if exe:
+        return [exe]
+
+    # 2) npx wrapper
+    npx = shutil.which("npx")
+    if npx:
+        return [npx, "gltf-pipeline"]
+
+    # 3) try common global locations
+    candidates = [
+        Path(os.path.expanduser("~/.npm-global/bin/gltf-pipeline")),
+        Path("/usr/local/bin/gltf-pipeline"),
+        Path("/usr/bin/gltf-pipeline"),
+    ]
+    for p in candidates:
+        try:
+            if p.exists():
+                return [str(p)]
+        except Exception:
+            continue
+
+    return None
+
+
+def compress_glb(src: Path, dst: Path, timeout: int = 120) -> str:
+    """gltf-pipeline으로 Draco 압축을 수행하고 stdout을 반환합니다."""
+    cmd_prefix = find_gltf_pipeline()
+    if not cmd_prefix:
+        raise FileNotFoundError("gltf-pipeline executable not found")
+    cmd = [*cmd_prefix, "-i", str(src), "-o", str(dst), "-d"]
+    res = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=timeout)
+    return res.stdout
@@ -0,0 +1,341 @@
+from itertools import combinations
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from gimmary.app.missions.feature_cache import FeatureCache, pair_key
+from gimmary.app.missions.ingest import derive_dino, derive_dust3r, derive_loftr, load_ingested
+from gimmary.app.missions.settings import MISSION_SETTINGS
+from gimmary.app.missions.utils import sha256_file
+from gimmary.app.missions.verify_backends import VerifyBackend, get_verify_backend
+
+# torch 없이 import 되는 검증 모듈: 모델 실행은 verify_backends의 백엔드(torch 또는 ONNX Runtime)가 담당
+
+# ─────────────────────────────────────────────
+# 설정
+# ─────────────────────────────────────────────
+DINO_THRESHOLD = 0.5
+LOFTR_INLIER_THRESHOLD = 10
+DINO_BATCH_SIZE = MISSION_SETTINGS.DINO_BATCH_SIZE
+LOFTR_BATCH_SIZE = MISSION_SETTINGS.LOFTR_BATCH_SIZE
+
+# 특징 캐시 네임스페이스: 모델이나 전처리 설정이 바뀌면 함께 바꿔야 합니다.
+# 실제 키에는 백엔드 태그(프로파일/ONNX)가 붙습니다.
+EMBEDDING_NAMESPACE = "dinov2_vitb14@224/exif"
+MATCH_NAMESPACE = "loftr_outdoor@640x480/exif"
+
+_feature_cache = None
+
+
+def get_feature_cache() -> FeatureCache | None:
+    global _feature_cache
+    if _feature_cache is None and MISSION_SETTINGS.FEATURE_CACHE_ENABLED:
+        _feature_cache = FeatureCache(
+            MISSION_SETTINGS.FEATURE_CACHE_PATH, MISSION_SETTINGS.FEATURE_CACHE_MAX_BYTES
+        )
+    return _feature_cache
+
+
+# ─────────────────────────────────────────────
+# 이미지 묶음 / 전처리
+# ─────────────────────────────────────────────
+def decode_rgb(path: Path) -> np.ndarray:
+    """EXIF 방향을 반영해 (H, W, 3) uint8 RGB 배열로 디코딩합니다."""
+    with Image.open(path) as img:
+        return np.asarray(ImageOps.exif_transpose(img).convert("RGB"))
+
+
+class ImageSet:
+    """한 번의 검증/재구성에 쓰이는 이미지 묶음.
+
+    업로드 시 저장된 모델별 입력(ingest.py)이 있으면 그것을 쓰고, 없을 때만 원본을
+    디코딩합니다. 이미지마다 디코딩·해시·입력 변환은 한 번씩만 수행합니다.
+    """
+
+    def __init__(
+        self,
+        paths: list[str | Path],
+        arrays: list[np.ndarray] | None = None,
+        hashes: list[str] | None = None,
+    ) -> None:
+        self.paths = [Path(p) for p in paths]
+        self._rgb = dict(enumerate(arrays)) if arrays is not None else {}
+        self._derived: dict[int, dict[str, np.ndarray]] = {}
+        self._gray: dict[int, np.ndarray] = {}
+        self._hashes = list(hashes) if hashes is not None else None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def name(self, i: int) -> str:
+        return self.paths[i].name
+
+    @property
+    def hashes(self) -> list[str]:
+        if self._hashes is None:
+            self._hashes = [sha256_file(p) for p in self.paths]
+        return self._hashes
+
+    def subset(self, indices: list[int]) -> "ImageSet":
+        """일부 이미지만 담은 ImageSet (이미 디코딩/변환한 결과는 공유)."""
+        sub = ImageSet([self.paths[i] for i in indices])
+        sub._rgb = {k: self._rgb[i] for k, i in enumerate(indices) if i in self._rgb}
+        sub._derived = {k: self._derived[i] for k, i in enumerate(indices) if i in self._derived}
+        sub._gray = {k: self._gray[i] for k, i in enumerate(indices) if i in self._gray}
+        if self._hashes is not None:
+            sub._hashes = [self._hashes[i] for i in indices]
+        return sub
+
+    def rgb(self, i: int) -> np.ndarray:
+        if i not in self._rgb:
+            self._rgb[i] = decode_rgb(self.paths[i])
+        return self._rgb[i]
+
+    def _model_input(self, i: int, key: str, derive) -> np.ndarray:
+        if i not in self._derived:
+            # 미리 디코딩된 배열을 받은 경우엔 그것을 기준으로 파생
+            self._derived[i] = (None if i in self._rgb else load_ingested(self.paths[i])) or {}
+        if key not in self._derived[i]:
+            self._derived[i][key] = derive(self.rgb(i))
+        return self._derived[i][key]
+
+    def dino_input(self, i: int) -> np.ndarray:
+        """DINOv2 입력: (224, 224, 3) uint8."""
+        return self._model_input(i, "dino", derive_dino)
+
+    def dust3r_input(self, i: int) -> np.ndarray:
+        """DUSt3R 입력: 긴 변 512px 리사이즈 후 16배수 중앙 크롭한 (H, W, 3) uint8."""
+        return self._model_input(i, "dust3r", derive_dust3r)
+
+    def gray(self, i: int) -> np.ndarray:
+        """LoFTR 입력: (1, 1, 480, 640) 0~1 float32 그레이스케일 배열."""
+        if i not in self._gray:
+            img = self._model_input(i, "loftr", derive_loftr)
+            self._gray[i] = (img.astype(np.float32) / 255.0)[None, None]
+        return self._gray[i]
+
+
+_DINO_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 3, 1, 1)
+_DINO_STD  = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 3, 1, 1)
+
+
+def preprocess_dino(images: ImageSet, indices: list[int]) -> np.ndarray:
+    """지정한 이미지들을 (N, 3, 224, 224) 정규화 배열 하나로 묶습니다."""
+    arr = np.stack([images.dino_input(i) for i in indices])
+    batch = arr.transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+    return (batch - _DINO_MEAN) / _DINO_STD
+
+
+# ─────────────────────────────────────────────
+# DINOv2 임베딩 / LoFTR 매칭
+# ─────────────────────────────────────────────
+def extract_embeddings(
+    backend: VerifyBackend, images: ImageSet, indices: list[int], batch_size: int = DINO_BATCH_SIZE
+) -> np.ndarray:
+    """DINOv2 임베딩을 미니배치로 추출해 (N, D) 배열로 반환합니다."""
+    batch = preprocess_dino(images, indices)
+    return np.concatenate([backend.embed(batch[start:start + batch_size]) for start in range(0, len(batch), batch_size)])
+
+
+def similarity_matrix(embeddings: np.ndarray) -> np.ndarray:
+    """L2 정규화 후 행렬곱 한 번으로 (N, N) 코사인 유사도 행렬을 계산합니다."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normed = embeddings / np.clip(norms, 1e-12, None)
+    return normed @ normed.T
+
+
+def load_embeddings(images: ImageSet) -> np.ndarray:
+    """캐시에 없는 이미지만 DINOv2로 추출하고 나머지는 캐시에서 읽어 (N, D)로 반환합니다."""
+    cache = get_feature_cache()
+    backend = get_verify_backend()
+    namespace = EMBEDDING_NAMESPACE + backend.tag
+    hashes = images.hashes
+    found = cache.get_embeddings(namespace, hashes) if cache else {}
+    missing = [i for i, h in enumerate(hashes) if h not in found]
+    if missing:
+        new = extract_embeddings(backend, images, missing)
+        computed = {hashes[i]: emb for i, emb in zip(missing, new)}
+        if cache:
+            cache.put_embeddings(namespace, computed)
+        found = {**found, **computed}
+    return np.stack([found[h] for h in hashes])
+
+
+def count_loftr_inliers_batch(backend: VerifyBackend, pairs: list[tuple[np.ndarray, np.ndarray]]) -> list[int]:
+    """여러 이미지 쌍을 LoFTR 한 번의 forward로 매칭하고 쌍마다 RANSAC 인라이어 수를 반환합니다."""
+    kp_a, kp_b, batch_idx = backend.match(
+        np.concatenate([a for a, _ in pairs]), np.concatenate([b for _, b in pairs])
+    )
+
+    counts = []
+    for b in range(len(pairs)):
+        sel = batch_idx == b
+        if sel.sum() < 4:
+            counts.append(0)
+            continue
+        _, mask = cv2.findHomography(kp_a[sel], kp_b[sel], cv2.RANSAC, 5.0)
+        counts.append(int(mask.sum()) if mask is not None else 0)
+    return counts
+
+
+def count_loftr_inliers(backend: VerifyBackend, path_a: Path, path_b: Path) -> int:
+    images = ImageSet([path_a, path_b])
+    return count_loftr_inliers_batch(backend, [(images.gray(0), images.gray(1))])[0]
+
+
+class _PairMatcher:
+    """캐시된 매칭 결과를 먼저 쓰고, 캐시에 없는 쌍만 LoFTR로 매칭합니다."""
+
+    def __init__(self, images: ImageSet) -> None:
+        self.images = images
+        self.hashes = images.hashes
+        self.cache = get_feature_cache()
+        self.backend = get_verify_backend()
+        self.namespace = MATCH_NAMESPACE + self.backend.tag
+        self.known: dict[str, int] = {}
+        self.computed: dict[str, int] = {}
+
+    def prefetch(self, pairs: list[tuple[int, int]]) -> None:
+        if self.cache:
+            self.known.update(self.cache.get_inliers(self.namespace, [(self.hashes[i], self.hashes[j]) for i, j in pairs]))
+
+    def cached(self, i: int, j: int) -> int | None:
+        return self.known.get(pair_key(self.hashes[i], self.hashes[j]))
+
+    def match(self, pairs: list[tuple[int, int]]) -> list[int]:
+        counts = count_loftr_inliers_batch(self.backend, [(self.images.gray(i), self.images.gray(j)) for i, j in pairs])
+        for (i, j), count in zip(pairs, counts):
+            key = pair_key(self.hashes[i], self.hashes[j])
+            self.known[key] = self.computed[key] = count
+        return counts
+
+    def flush(self) -> None:
+        if self.cache and self.computed:
+            self.cache.put_inliers(self.namespace, self.computed)
+            self.computed = {}
+
+
+# ─────────────────────────────────────────────
+# 동일 피사체 검증 (verify_same_subject.py 기반)
+# ─────────────────────────────────────────────
+def verify_same_subject(images: ImageSet) -> tuple[bool, str, np.ndarray]:
+    """모든 사진이 LoFTR 매칭 그래프로 하나로 연결되는지 확인합니다.
+
+    DINOv2 유사도가 높은 쌍부터 확인하되, 이미 같은 컴포넌트에 속한 쌍은 건너뛰고
+    그래프가 연결되는 즉시 멈춥니다. 모두 같은 피사체라면 LoFTR 호출은 약 n-1번입니다.
+    재구성 페어 그래프에 쓰도록 유사도 행렬도 함께 반환합니다.
+    """
+    sims = similarity_matrix(load_embeddings(images))
+
+    candidates = []
+    log_lines = []
+    for i, j in combinations(range(len(images)), 2):
+        sim = sims[i, j]
+        if sim >= DINO_THRESHOLD:
+            candidates.append((i, j))
+        log_lines.append(f"{images.name(i)} ↔ {images.name(j)}: DINOv2={sim:.3f}")
+    candidates.sort(key=lambda p: sims[p], reverse=True)
+
+    parent = list(range(len(images)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(x, y):
+        parent[find(x)] = find(y)
+
+    matcher = _PairMatcher(images)
+    matcher.prefetch(candidates)
+    components = len(images)
+    checked = 0
+    remaining = candidates
+    while components > 1 and remaining:
+        # 서로 다른 컴포넌트를 잇는 쌍만, 컴포넌트 조합당 하나씩 배치로 모음
+        batch, seen, rest = [], set(), []
+        for i, j in remaining:
+            ri, rj = find(i), find(j)
+            if ri == rj:
+                continue
+            if len(batch) >= LOFTR_BATCH_SIZE or (min(ri, rj), max(ri, rj)) in seen:
+                rest.append((i, j))
+                continue
+            inliers = matcher.cached(i, j)
+            if inliers is not None:
+                # 캐시 적중은 바로 반영해 이후 후보를 더 줄임
+                log_lines.append(f"  └ {images.name(i)} ↔ {images.name(j)}: LoFTR inliers={inliers} (cached)")
+                checked += 1
+                if inliers >= LOFTR_INLIER_THRESHOLD:
+                    union(i, j)
+                    components -= 1
+                continue
+            seen.add((min(ri, rj), max(ri, rj)))
+            batch.append((i, j))
+        remaining = rest
+        if not batch:
+            continue
+
+        for (i, j), inliers in zip(batch, matcher.match(batch)):
+            log_lines.append(f"  └ {images.name(i)} ↔ {images.name(j)}: LoFTR inliers={inliers}")
+            checked += 1
+            if inliers >= LOFTR_INLIER_THRESHOLD and find(i) != find(j):
+                union(i, j)
+                components -= 1
+    matcher.flush()
+
+    log_lines.append(f"LoFTR 확인 {checked}쌍 / 후보 {len(candidates)}쌍")
+    same = components == 1
+    return same, "\n".join(log_lines), sims
+
+
+def match_against_accepted(
+    path: Path, content_hash: str, accepted: list[tuple[Path, str, int]]
+) -> tuple[set[int], str]:
+    """새 사진 한 장을 이미 수락된 사진들과 비교해 연결되는 컴포넌트 id 집합을 반환합니다.
+
+    accepted는 (경로, 해시, 컴포넌트 id) 리스트입니다. DINOv2 유사도가 높은 사진부터
+    LoFTR로 확인하고, 이미 연결된 컴포넌트의 나머지 사진은 건너뛰므로 업로드마다
+    O(n) 이하의 작업만 합니다.
+    """
+    if not accepted:
+        return set(), ""
+    images = ImageSet([path] + [a[0] for a in accepted], hashes=[content_hash] + [a[1] for a in accepted])
+    components = [None] + [a[2] for a in accepted]
+    sims = similarity_matrix(load_embeddings(images))[0]
+    candidates = [k for k in np.argsort(-sims[1:]) + 1 if sims[k] >= DINO_THRESHOLD]
+
+    matcher = _PairMatcher(images)
+    matcher.prefetch([(0, k) for k in candidates])
+    matched = set()
+    log_lines = []
+    while candidates:
+        # 컴포넌트마다 가장 유사한 후보 하나씩 배치로 매칭
+        batch, seen, rest = [], set(), []
+        for k in candidates:
+            if components[k] in matched:
+                continue
+            if len(batch) >= LOFTR_BATCH_SIZE or components[k] in seen:
+                rest.append(k)
+                continue
+            inliers = matcher.cached(0, k)
+            if inliers is not None:
+                log_lines.append(f"{path.name} ↔ {images.name(k)}: DINOv2={sims[k]:.3f}, LoFTR inliers={inliers} (cached)")
+                if inliers >= LOFTR_INLIER_THRESHOLD:
+                    matched.add(components[k])
+                continue
+            seen.add(components[k])
+            batch.append(k)
+        candidates = rest
+        if not batch:
+            continue
+
+        for k, inliers in zip(batch, matcher.match([(0, k) for k in batch])):
+            log_lines.append(f"{path.name} ↔ {images.name(k)}: DINOv2={sims[k]:.3f}, LoFTR inliers={inliers}")
+            if inliers >= LOFTR_INLIER_THRESHOLD:
+                matched.add(components[k])
+    matcher.flush()
+    return matched, "\n".join(log_lines)
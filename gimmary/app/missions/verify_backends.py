@@ -0,0 +1,165 @@
+import logging
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from gimmary.app.missions.settings import MISSION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# `python -m gimmary.app.missions.generate_model --export-onnx`로 한 번 만들어 둡니다.
+ONNX_DIR = Path(MISSION_SETTINGS.WEIGHTS_DIR) / "onnx"
+DINO_ONNX = ONNX_DIR / "dinov2_vitb14.onnx"
+LOFTR_ONNX = ONNX_DIR / "loftr_outdoor_640x480.onnx"
+
+
+class VerifyBackend(Protocol):
+    """동일 피사체 검증에 쓰는 DINOv2/LoFTR 실행기.
+
+    tag는 특징 캐시 네임스페이스에 붙어, 출력이 조금씩 다른 백엔드끼리 캐시를 섞지 않게 합니다.
+    """
+
+    name: str
+    tag: str
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        """(N, 3, 224, 224) 정규화 배열 → (N, D) float32 임베딩."""
+        ...
+
+    def match(self, image0: np.ndarray, image1: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(N, 1, 480, 640) 그레이스케일 쌍 → (keypoints0, keypoints1, batch_indexes)."""
+        ...
+
+
+class TorchBackend:
+    """generate_model의 PyTorch 모델(get_dino/get_loftr)로 실행합니다. 항상 사용할 수 있는 기본값입니다."""
+
+    name = "torch"
+
+    def __init__(self) -> None:
+        from gimmary.app.missions import generate_model
+        self._gm = generate_model
+        self.tag = generate_model._PROFILE_SUFFIX
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        import torch
+
+        gm = self._gm
+        tensor = torch.from_numpy(batch).to(gm.DEVICE)
+        if gm.INFERENCE_PROFILE != "fp32":
+            tensor = tensor.contiguous(memory_format=torch.channels_last)
+        with gm.RESIDENCY.hold("dino") as model, gm.inference_context():
+            return model(tensor).float().cpu().numpy()
+
+    def match(self, image0: np.ndarray, image1: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        import torch
+
+        gm = self._gm
+        with gm.RESIDENCY.hold("loftr") as model, gm.inference_context():
+            out = model({
+                "image0": torch.from_numpy(image0).to(gm.DEVICE),
+                "image1": torch.from_numpy(image1).to(gm.DEVICE),
+            })
+        return (
+            out["keypoints0"].float().cpu().numpy(),
+            out["keypoints1"].float().cpu().numpy(),
+            out["batch_indexes"].cpu().numpy(),
+        )
+
+
+class OnnxBackend:
+    """내보낸 ONNX 모델을 ONNX Runtime CPU 실행기로 돌립니다. torch를 import 하지 않습니다."""
+
+    name = "onnx"
+    tag = "/onnx"
+
+    def __init__(self, dino_path: Path = DINO_ONNX, loftr_path: Path = LOFTR_ONNX) -> None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if MISSION_SETTINGS.INFERENCE_TORCH_THREADS:
+            options.intra_op_num_threads = MISSION_SETTINGS.INFERENCE_TORCH_THREADS
+        providers = ["CPUExecutionProvider"]
+        self._dino = ort.InferenceSession(str(dino_path), options, providers=providers)
+        self._loftr = ort.InferenceSession(str(loftr_path), options, providers=providers)
+
+    def embed(self, batch: np.ndarray) -> np.ndarray:
+        (embeddings,) = self._dino.run(None, {"pixel_values": np.ascontiguousarray(batch, dtype=np.float32)})
+        return embeddings
+
+    def match(self, image0: np.ndarray, image1: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        kp0, kp1, batch_idx = self._loftr.run(None, {
+            "image0": np.ascontiguousarray(image0, dtype=np.float32),
+            "image1": np.ascontiguousarray(image1, dtype=np.float32),
+        })
+        return kp0, kp1, batch_idx
+
+
+def export_onnx(out_dir: Path = ONNX_DIR) -> list[Path]:
+    """PyTorch DINOv2/LoFTR를 ONNX로 내보냅니다. 모델 변경 시 한 번만 실행합니다 (`uv sync --extra onnx` 필요)."""
+    import torch
+    from gimmary.app.missions import generate_model as gm
+
+    if gm.INFERENCE_PROFILE != "fp32":
+        raise RuntimeError("ONNX export needs the fp32 models (set MISSION_INFERENCE_PROFILE=fp32)")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    width, height = gm.LOFTR_SIZE
+
+    class _LoFTRExport(torch.nn.Module):
+        # dict 입출력을 ONNX가 다룰 수 있는 텐서 튜플로 바꿈
+        def __init__(self, matcher):
+            super().__init__()
+            self.matcher = matcher
+
+        def forward(self, image0, image1):
+            out = self.matcher({"image0": image0, "image1": image1})
+            return out["keypoints0"], out["keypoints1"], out["batch_indexes"]
+
+    dino_path, loftr_path = out_dir / DINO_ONNX.name, out_dir / LOFTR_ONNX.name
+    with torch.no_grad():
+        # 매칭 수에 따라 출력 크기가 달라지는 LoFTR 때문에 TorchScript 기반 exporter를 사용
+        torch.onnx.export(
+            gm.get_dino().cpu(), (torch.zeros(1, 3, 224, 224),), str(dino_path),
+            input_names=["pixel_values"], output_names=["embeddings"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "embeddings": {0: "batch"}},
+            opset_version=17, dynamo=False,
+        )
+        dummy = torch.rand(1, 1, height, width)
+        torch.onnx.export(
+            _LoFTRExport(gm.get_loftr().cpu()), (dummy, dummy), str(loftr_path),
+            input_names=["image0", "image1"], output_names=["keypoints0", "keypoints1", "batch_indexes"],
+            dynamic_axes={
+                "image0": {0: "batch"}, "image1": {0: "batch"},
+                "keypoints0": {0: "matches"}, "keypoints1": {0: "matches"}, "batch_indexes": {0: "matches"},
+            },
+            opset_version=17, dynamo=False,
+        )
+    gm.get_dino().to(gm.DEVICE)
+    gm.get_loftr().to(gm.DEVICE)
+    return [dino_path, loftr_path]
+
+
+_backend: VerifyBackend | None = None
+
+
+def get_verify_backend() -> VerifyBackend:
+    """MISSION_VERIFY_BACKEND에 따라 백엔드를 고릅니다. ONNX를 쓸 수 없으면 PyTorch로 대체합니다."""
+    global _backend
+    if _backend is None:
+        if MISSION_SETTINGS.VERIFY_BACKEND == "onnx":
+            try:
+                _backend = OnnxBackend()
+            except Exception:
+                logger.exception("ONNX Runtime backend unavailable; falling back to PyTorch")
+        elif MISSION_SETTINGS.VERIFY_BACKEND != "torch":
+            raise ValueError(f"unknown verify backend {MISSION_SETTINGS.VERIFY_BACKEND!r}")
+        if _backend is None:
+            _backend = TorchBackend()
+    return _backend
+
+
+def loaded_backend() -> str | None:
+    """이미 만들어진 백엔드 이름 (아직 없으면 None)."""
+    return _backend.name if _backend is not None else None
@@ -0,0 +1,42 @@
+"""3D 재구성 작업 워커.
+
+FastAPI 앱을 띄우지 않고 reconstruction_jobs 큐만 비웁니다.
+여러 머신에서 동시에 실행해도 SKIP LOCKED로 작업이 한 번씩만 배정됩니다.
+
+    gimmary-worker --concurrency 2
+    python -m gimmary.app.missions.worker
+"""
+import argparse
+import logging
+import signal
+
+from gimmary.app.missions.jobs import JobWorker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drain the reconstruction job queue.")
+    parser.add_argument("--worker-id", default=None, help="워커 식별자 (기본값: host:pid:random)")
+    parser.add_argument("--concurrency", type=int, default=1, help="이 프로세스에서 돌릴 워커 스레드 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    workers = [
+        JobWorker(f"{args.worker_id}-{i}" if args.worker_id else None)
+        for i in range(args.concurrency)
+    ]
+
+    def shutdown(signum, frame):
+        for worker in workers:
+            worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    threads = [worker.start() for worker in workers]
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
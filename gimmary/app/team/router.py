@@ -9,6 +9,7 @@ from gimmary.database.models import Group, Team, TeamMember, User, UserRole, Mis
 from gimmary.app.auth.utils import get_current_user
 from gimmary.app.team.schemas import TeamCreateRequest, TeamJoinRequest, TeamMemberResponse, TeamResponse, TeamUpdateRequest, MyTeamResponse, create_auth_code
 from gimmary.app.missions.schemes import MissionResponse
+from gimmary.app.missions.artifacts import lod_urls
 
 team_router = APIRouter(prefix="/teams", tags=["teams"])
 
@@ -132,6 +133,7 @@ def get_team_missions(
             points=m.points,
             created_at=m.created_at.isoformat() if m.created_at else "",
             model_url=m.model_url,
+            lods=lod_urls(db_session, m.model_url),
         )
         for m in missions
     ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text, Index, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from gimmary.database.common import Base
 from enum import Enum
@@ -86,6 +86,17 @@ class MissionStatus(Enum):
     SUCCESS = 'success'
     FAIL = 'fail'
 
+class JobKind(Enum):
+    VERIFY = 'verify'
+    RECONSTRUCT = 'reconstruct'
+    COMPRESS = 'compress'
+
+class JobStatus(Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAIL = 'fail'
+
 class Mission(Base):
     __tablename__ = 'missions'
     id = Column(Integer, primary_key=True)
@@ -143,4 +154,79 @@ class Pictures(Base):
     user_id = Column(Integer, ForeignKey('users.id'))
     url = Column(String(255))
     uploaded_at = Column(DateTime)
-    user = relationship('User')
\ No newline at end of file
+    content_hash = Column(String(64), nullable=True)
+    # 업로드 시 검증 결과: 같은 그룹 미션 안에서 서로 연결된 사진들은 같은 component_id(대표 사진 id)를 가짐
+    component_id = Column(Integer, nullable=True)
+    matched = Column(Boolean, nullable=True)
+    verified_at = Column(DateTime, nullable=True)
+    user = relationship('User')
+
+class ReconstructionJob(Base):
+    __tablename__ = 'reconstruction_jobs'
+    id = Column(Integer, primary_key=True)
+    group_mission_id = Column(Integer, ForeignKey('group_missions.id'))
+    mission_id = Column(Integer, ForeignKey('missions.id'))
+    team_id = Column(Integer, ForeignKey('teams.id'), nullable=True)  # 팀별 공정 분배 단위 (미션의 팀)
+    artifact_id = Column(Integer, ForeignKey('model_artifacts.id'), nullable=True)  # 'compress' 작업이 만들 변형
+    kind = Column(String(20), default=JobKind.RECONSTRUCT.value)  # 'verify', 'reconstruct'
+    picture_id = Column(Integer, ForeignKey('pictures.id'), nullable=True)
+    quality = Column(String(20), nullable=True)  # 'preview', 'standard', 'high' (deadline만 있으면 실행 시 결정)
+    deadline = Column(Float, nullable=True)  # 목표 소요 시간(초)
+    image_count = Column(Integer, nullable=True)  # 재구성에 사용한 사진 수 (소요 시간 추정용)
+    status = Column(String(20), default=JobStatus.QUEUED.value)  # 'queued', 'running', 'success', 'fail'
+    stage = Column(String(30), nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    worker_id = Column(String(64), nullable=True)
+    available_at = Column(DateTime)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    timings = Column(Text, nullable=True)  # JSON: 단계별 소요 시간(초)
+    download_url = Column(String(255), nullable=True)
+    log = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    group_mission = relationship('GroupMission')
+
+    __table_args__ = (
+        Index('ix_reconstruction_jobs_status_available_at', 'status', 'available_at'),
+        Index('ix_reconstruction_jobs_status_kind_team_id', 'status', 'kind', 'team_id'),
+    )
+
+class ArtifactStatus(Enum):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAIL = 'fail'
+
+class ModelArtifact(Base):
+    """생성된 GLB의 변형(원본, Draco 압축 등). 원본 GLB의 SHA-256으로 묶이며 변형마다 한 번만 만듭니다."""
+    __tablename__ = 'model_artifacts'
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64))  # 원본 GLB의 SHA-256
+    variant = Column(String(20))  # 'original', 'draco'
+    status = Column(String(20), default=ArtifactStatus.PENDING.value)  # 'pending', 'ready', 'fail'
+    filename = Column(String(255), nullable=True)  # 저장소 참조(blob:...) 또는 예전 downloads/ 아래 파일 이름
+    size = Column(Integer, nullable=True)
+    sha256 = Column(String(64), nullable=True)  # 변형 파일 자체의 SHA-256
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('content_hash', 'variant', name='uq_model_artifacts_content_hash_variant'),
+    )
+
+class StoredBlob(Base):
+    """내용 주소 저장소의 파일 하나. refcount는 이 파일을 가리키는 행(사진, 미션 모델, 모델 변형) 수입니다."""
+    __tablename__ = 'stored_blobs'
+    id = Column(Integer, primary_key=True)
+    key = Column(String(128), unique=True, nullable=False)  # ab/cd/<sha256><확장자>
+    size = Column(Integer, nullable=True)
+    refcount = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime)
+    released_at = Column(DateTime, nullable=True)  # 마지막으로 참조가 없어진 시각 (GC 유예 기준)
+
+    __table_args__ = (
+        Index('ix_stored_blobs_refcount_released_at', 'refcount', 'released_at'),
+    )
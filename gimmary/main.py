@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exception_handlers import request_validation_exception_handler
@@ -5,13 +7,37 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from gimmary.api import api_router
+from gimmary.app.missions.jobs import start_embedded_workers
+from gimmary.app.missions.preload import ModelPreloader
+from gimmary.app.missions.settings import MISSION_SETTINGS
+
+PRELOADER = ModelPreloader(MISSION_SETTINGS.PRELOAD_MODELS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # 설정된 모델을 백그라운드에서 미리 로드 (완료 전까지 /health/ready 는 503)
+  PRELOADER.start()
+  # 재구성 큐를 비우는 워커 스레드 (별도 gimmary-worker 프로세스만 쓸 경우 0)
+  workers = start_embedded_workers(MISSION_SETTINGS.EMBEDDED_WORKERS)
+  yield
+  for worker in workers:
+    worker.stop()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(api_router, prefix="/api")
 app.add_middleware(CORSMiddleware, allow_origins=["https://wafhk26-web.vercel.app"], allow_methods=["*"], allow_headers=["*"])
 
 
 @app.get('/health')
+@app.get('/health/live')
 def health():
-  return 'ok'
\ No newline at end of file
+  return 'ok'
+
+
+@app.get('/health/ready')
+def readiness():
+  status = PRELOADER.status()
+  return JSONResponse(status, status_code=200 if status["ready"] else 503)
\ No newline at end of file
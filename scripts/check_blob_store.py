@@ -0,0 +1,214 @@
+"""내용 주소 저장소 백엔드가 같은 규약을 지키는지 확인합니다.
+
+로컬 파일 시스템 저장소와, 디렉터리를 버킷처럼 쓰는 S3 대역(stand-in) 클라이언트를 붙인
+S3 저장소에 대해 같은 검사를 돌립니다. `--s3-endpoint`를 주면 실제 S3 호환 서버(MinIO 등)에도
+돌립니다 (`uv sync --extra s3` 필요). 참조 수/GC는 메모리 sqlite로 확인합니다. 하나라도 어긋나면 0이 아닌 코드로 종료합니다.
+
+    uv run python scripts/check_blob_store.py
+    uv run python scripts/check_blob_store.py --s3-endpoint http://localhost:9000 --bucket gimmary-check
+"""
+import argparse
+import hashlib
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from gimmary.app.missions import storage
+from gimmary.app.missions.storage import LocalBlobStore, S3BlobStore, blob_key
+from gimmary.database.models import StoredBlob
+
+
+class _Missing(Exception):
+    """botocore ClientError처럼 response["Error"]["Code"]를 갖는 404."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(key)
+        self.response = {"Error": {"Code": "404"}}
+
+
+class DirectoryS3Client:
+    """버킷/키를 root 아래 디렉터리로 흉내 내는 S3 대역. 호출 횟수를 셉니다."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.calls: dict[str, int] = {}
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def upload_file(self, filename: str, bucket: str, key: str) -> None:
+        self._count("upload_file")
+        path = self._path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, path)
+
+    def download_file(self, bucket: str, key: str, filename: str) -> None:
+        self._count("download_file")
+        path = self._path(bucket, key)
+        if not path.is_file():
+            raise _Missing(key)
+        shutil.copyfile(path, filename)
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        self._count("head_object")
+        path = self._path(Bucket, Key)
+        if not path.is_file():
+            raise _Missing(Key)
+        return {"ContentLength": path.stat().st_size}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self._count("delete_object")
+        self._path(Bucket, Key).unlink(missing_ok=True)
+        return {}
+
+
+def _write(path: Path, data: bytes) -> tuple[Path, str]:
+    path.write_bytes(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+# ─────────────────────────────────────────────
+# 검사
+# ─────────────────────────────────────────────
+def check_store(store, work: Path) -> list[str]:
+    """BlobStore 규약: 중복 제거, 원자적 이동, 읽기, 없는 키, 파생 파일까지 삭제."""
+    failures = []
+
+    def expect(ok: bool, message: str) -> None:
+        if not ok:
+            failures.append(f"{store.name}: {message}")
+
+    data = b"\xff\xd8\xff" + bytes(range(256)) * 64
+    src, content_hash = _write(work / "a.part", data)
+    key = blob_key(content_hash, ".jpg")
+    expect(key.startswith(f"{content_hash[:2]}/{content_hash[2:4]}/"), f"key is not sharded: {key}")
+    expect(not store.exists(key), "key exists before put")
+    expect(store.put(src, key) is True, "first put did not report a new blob")
+    expect(not src.exists(), "source file left behind after put")
+    expect(store.exists(key), "key missing after put")
+
+    duplicate, _ = _write(work / "b.part", data)
+    expect(store.put(duplicate, key) is False, "duplicate put reported a new blob")
+    expect(not duplicate.exists(), "duplicate source file left behind")
+
+    path = store.local_path(key)
+    expect(path.read_bytes() == data, "local copy differs from uploaded bytes")
+    derived = path.with_name(path.name[:64] + ".ingest.npz")
+    derived.write_bytes(b"derived")
+
+    try:
+        store.local_path(blob_key("0" * 64, ".jpg"))
+        expect(False, "missing key did not raise FileNotFoundError")
+    except FileNotFoundError:
+        pass
+
+    store.delete(key)
+    expect(not store.exists(key), "key still exists after delete")
+    expect(not derived.exists(), "derived file left behind after delete")
+    return failures
+
+
+def check_s3_cache(root: Path) -> list[str]:
+    """S3 저장소는 방금 올린 파일을 캐시로 남기고, 캐시가 없을 때만 내려받아야 함."""
+    failures = []
+    client = DirectoryS3Client(root / "bucket")
+    store = S3BlobStore(client, "check", root / "cache", prefix="blobs/")
+    src, content_hash = _write(root / "c.part", b"glb" * 1000)
+    key = blob_key(content_hash, ".glb")
+    store.put(src, key)
+    store.local_path(key)
+    if client.calls.get("download_file"):
+        failures.append("s3: downloaded a blob that was just uploaded from this host")
+    shutil.rmtree(root / "cache")
+    if store.local_path(key).read_bytes() != b"glb" * 1000 or client.calls.get("download_file") != 1:
+        failures.append("s3: cold read did not download the blob exactly once")
+    if not (root / "bucket" / "check" / "blobs" / key).is_file():
+        failures.append("s3: object not stored under the configured prefix")
+    return failures
+
+
+def check_refcounts(store, work: Path) -> list[str]:
+    """참조가 남아 있거나 유예 중인 파일은 지우지 않고, 유예가 지난 파일만 지워야 함."""
+    failures = []
+    engine = create_engine("sqlite://")
+    StoredBlob.__table__.create(engine)
+    session = sessionmaker(engine)()
+    storage._store = store
+
+    kept_src, kept_hash = _write(work / "kept.part", b"kept")
+    dropped_src, dropped_hash = _write(work / "dropped.part", b"dropped")
+    kept = storage.put_blob(session, kept_src, kept_hash, ".jpg")
+    dropped = storage.put_blob(session, dropped_src, dropped_hash, ".jpg")
+    # 같은 사진을 두 번 올림 → 파일 하나, 참조 둘
+    again_src, _ = _write(work / "again.part", b"kept")
+    storage.put_blob(session, again_src, kept_hash, ".jpg")
+    storage.acquire(session, kept)
+    storage.acquire(session, kept)
+    storage.acquire(session, dropped)
+    session.commit()
+    storage.release(session, kept)
+    storage.release(session, dropped)
+    session.commit()
+
+    if session.query(StoredBlob).count() != 2:
+        failures.append("refcount: duplicate upload created a second blob row")
+    if storage.collect_garbage(session, grace=3600) != 0:
+        failures.append("refcount: collected a blob still inside its grace period")
+
+    # 유예 시간이 지난 것으로 만듦
+    session.query(StoredBlob).update({"released_at": datetime.utcnow() - timedelta(hours=2)})
+    session.commit()
+    deleted = []
+    collected = storage.collect_garbage(session, grace=3600, on_delete=lambda s, ref: deleted.append(ref))
+    if collected != 1 or deleted != [dropped]:
+        failures.append(f"refcount: expected only the unreferenced blob to be collected, got {deleted}")
+    if not store.exists(storage.ref_key(kept)) or store.exists(storage.ref_key(dropped)):
+        failures.append("refcount: blob files do not match the collected rows")
+    session.close()
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--s3-endpoint", help="실제 S3 호환 서버로도 확인 (`uv sync --extra s3` 필요)")
+    parser.add_argument("--bucket", default="gimmary-check")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        stores = {
+            "local": LocalBlobStore(root / "local"),
+            "s3-stand-in": S3BlobStore(DirectoryS3Client(root / "s3"), "check", root / "s3-cache"),
+        }
+        if args.s3_endpoint:
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=args.s3_endpoint)
+            stores["s3"] = S3BlobStore(client, args.bucket, root / "s3-remote-cache", prefix="check/")
+        for name, store in stores.items():
+            work = root / f"work-{name}"
+            work.mkdir()
+            found = check_store(store, work) + check_refcounts(store, work)
+            print(f"{name}: {'ok' if not found else f'{len(found)} failure(s)'}")
+            failures += found
+        (root / "cache-check").mkdir()
+        found = check_s3_cache(root / "cache-check")
+        print(f"s3 cache: {'ok' if not found else f'{len(found)} failure(s)'}")
+        failures += found
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""API 프로세스의 import 그래프에 ML 스택이 새어 들어오지 않았는지 확인합니다.
+
+`python -X importtime -c "import gimmary.main"`을 별도 프로세스로 실행해
+금지된 모듈(torch, gradio 등)이 로드되면, 또는 전체 import 시간이 예산을
+넘으면 0이 아닌 코드로 종료합니다. CI나 배포 전에 실행합니다.
+
+    uv run python scripts/check_import_budget.py --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# API 프로세스에서 import 되면 안 되는 무거운 모듈 (재구성 워커에서만 로드)
+FORBIDDEN = ("torch", "gradio", "kornia", "cv2", "sklearn", "PIL", "mini_dust3r", "trimesh")
+
+# 설정 로드에 필요한 환경 변수 (실제 DB 연결은 하지 않음)
+PLACEHOLDER_ENV = {
+    "DB_DIALECT": "mysql",
+    "DB_DRIVER": "pymysql",
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_USER": "gimmary",
+    "DB_PASSWORD": "gimmary",
+    "DB_DATABASE": "gimmary",
+    "ACCESS_TOKEN_SECRET": "import-budget",
+    "REFRESH_TOKEN_SECRET": "import-budget",
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int]]:
+    """`-X importtime` 출력에서 (모듈 이름, 누적 시간 us) 목록을 뽑습니다."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(cumulative_us)))
+    return modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="gimmary.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="전체 import 시간 예산 (ms)")
+    args = parser.parse_args()
+
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+        capture_output=True, text=True, env=env,
+    )
+    modules = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        print(f"FAIL: import {args.module} exited with {proc.returncode}", file=sys.stderr)
+        return 1
+
+    leaked = sorted({name for name, _ in modules if name.split(".")[0] in FORBIDDEN})
+    total_ms = next((us for name, us in reversed(modules) if name == args.module), 0) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, us in sorted(modules, key=lambda m: m[1], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: heavy modules imported by {args.module}: {', '.join(leaked[:20])}", file=sys.stderr)
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
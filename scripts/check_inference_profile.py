@@ -0,0 +1,168 @@
+"""추론 프로파일(bf16/int8)과 ONNX 검증 백엔드가 fp32 대비 허용 오차 안에 있는지 확인합니다.
+
+고정된 이미지 세트(`<dir>/<피사체>/*.jpg` 구조)에 대해 프로파일마다 별도
+프로세스에서 다음을 계산하고 fp32 결과와 비교합니다.
+
+- 모든 이미지 쌍의 동일 피사체 판정 (DINOv2 유사도 + LoFTR 인라이어 기준)
+- 피사체별 DUSt3R 메시: 정규화한 Chamfer 거리와 정점 수 비율
+
+판정 불일치나 메시 차이가 허용치를 넘으면 0이 아닌 코드로 종료합니다.
+
+    uv run python scripts/check_inference_profile.py --images samples/ --profile bf16 --profile int8 --profile onnx
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def collect_images(root: Path) -> dict[str, list[Path]]:
+    subjects = {}
+    for subject in sorted(p for p in root.iterdir() if p.is_dir()):
+        paths = sorted(p for p in subject.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if paths:
+            subjects[subject.name] = paths
+    return subjects
+
+
+# ─────────────────────────────────────────────
+# 자식 프로세스: 한 프로파일로 판정/메시 계산
+# ─────────────────────────────────────────────
+def run_profile(root: Path, out_dir: Path, mesh_points: int) -> None:
+    import torch
+    import trimesh
+    from gimmary.app.missions import generate_model as gm
+    from gimmary.app.missions import verification as vf
+
+    torch.manual_seed(0)
+    subjects = collect_images(root)
+    paths = [p for ps in subjects.values() for p in ps]
+    images = vf.ImageSet(paths)
+    backend = vf.get_verify_backend()
+
+    sims = vf.similarity_matrix(vf.extract_embeddings(backend, images, list(range(len(images)))))
+    pairs = list(combinations(range(len(images)), 2))
+    inliers = []
+    for start in range(0, len(pairs), vf.LOFTR_BATCH_SIZE):
+        batch = pairs[start:start + vf.LOFTR_BATCH_SIZE]
+        inliers += vf.count_loftr_inliers_batch(backend, [(images.gray(i), images.gray(j)) for i, j in batch])
+    same = [bool(sims[i, j] >= vf.DINO_THRESHOLD and n >= vf.LOFTR_INLIER_THRESHOLD) for (i, j), n in zip(pairs, inliers)]
+
+    meshes = {}
+    for name, subject_paths in subjects.items():
+        if len(subject_paths) < 2:
+            continue
+        subject_images = vf.ImageSet(subject_paths)
+        mesh_path = gm.reconstruct_3d(subject_images, sims=None)
+        mesh = trimesh.load(mesh_path, force="mesh")
+        points, _ = trimesh.sample.sample_surface(mesh, mesh_points, seed=0)
+        np.save(out_dir / f"{name}.npy", points.astype(np.float32))
+        meshes[name] = {"vertices": int(len(mesh.vertices))}
+        os.unlink(mesh_path)
+
+    summary = {
+        "profile": f"{backend.name}{backend.tag}",
+        "pairs": [[paths[i].name, paths[j].name] for i, j in pairs],
+        "sims": [float(sims[i, j]) for i, j in pairs],
+        "inliers": inliers,
+        "same": same,
+        "meshes": meshes,
+    }
+    (out_dir / "summary.json").write_text(json.dumps(summary))
+
+
+# ─────────────────────────────────────────────
+# 부모 프로세스: fp32 기준과 비교
+# ─────────────────────────────────────────────
+def normalized_chamfer(a: np.ndarray, b: np.ndarray, chunk: int = 1024) -> float:
+    """두 점군을 중심/bbox 대각선 길이로 정규화한 뒤의 대칭 Chamfer 거리."""
+    def normalize(p):
+        p = p - p.mean(axis=0)
+        return p / max(np.linalg.norm(p.max(axis=0) - p.min(axis=0)), 1e-12)
+
+    def nearest(src, dst):
+        return np.concatenate([
+            np.sqrt(((src[k:k + chunk, None, :] - dst[None]) ** 2).sum(-1)).min(axis=1)
+            for k in range(0, len(src), chunk)
+        ])
+
+    a, b = normalize(a), normalize(b)
+    return float(nearest(a, b).mean() + nearest(b, a).mean()) / 2
+
+
+def spawn(profile: str, root: Path, out_dir: Path, mesh_points: int) -> dict:
+    env = {
+        **os.environ,
+        # "onnx"는 fp32 PyTorch 재구성 + ONNX Runtime 검증 백엔드
+        "MISSION_INFERENCE_PROFILE": "fp32" if profile == "onnx" else profile,
+        "MISSION_VERIFY_BACKEND": "onnx" if profile == "onnx" else "torch",
+        # 다른 프로파일이 캐시한 특징·페어 예측·카메라 포즈(warm start)를 읽지 않도록 캐시는 모두 끔
+        "MISSION_FEATURE_CACHE_ENABLED": "false",
+        "MISSION_DUST3R_CACHE_ENABLED": "false",
+    }
+    subprocess.run(
+        [sys.executable, __file__, "--images", str(root), "--run", str(out_dir), "--mesh-points", str(mesh_points)],
+        check=True, env=env,
+    )
+    return json.loads((out_dir / "summary.json").read_text())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, required=True, help="<dir>/<피사체>/*.jpg 구조의 고정 이미지 세트")
+    parser.add_argument("--profile", action="append", default=[], help="비교할 프로파일 (여러 번 지정 가능)")
+    parser.add_argument("--max-decision-flips", type=int, default=0, help="허용하는 판정 불일치 쌍 수")
+    parser.add_argument("--max-chamfer", type=float, default=0.01, help="허용하는 정규화 Chamfer 거리")
+    parser.add_argument("--max-vertex-drift", type=float, default=0.1, help="허용하는 정점 수 변화 비율")
+    parser.add_argument("--mesh-points", type=int, default=4096)
+    parser.add_argument("--run", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_profile(args.images, args.run, args.mesh_points)
+        return 0
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for profile in ["fp32", *args.profile]:
+            out_dir = Path(tmp) / profile
+            out_dir.mkdir()
+            outputs[profile] = spawn(profile, args.images, out_dir, args.mesh_points)
+
+        base = outputs["fp32"]
+        for profile in args.profile:
+            result = outputs[profile]
+            flips = [
+                f"{a} / {b}"
+                for (a, b), x, y in zip(base["pairs"], base["same"], result["same"]) if x != y
+            ]
+            max_sim_diff = max((abs(x - y) for x, y in zip(base["sims"], result["sims"])), default=0.0)
+            print(f"[{profile}] 판정 불일치 {len(flips)}/{len(base['pairs'])}쌍, 최대 유사도 차이 {max_sim_diff:.4f}")
+            for flip in flips:
+                print(f"  flip: {flip}")
+            if len(flips) > args.max_decision_flips:
+                failed = True
+
+            for name, meta in base["meshes"].items():
+                chamfer = normalized_chamfer(
+                    np.load(Path(tmp) / "fp32" / f"{name}.npy"), np.load(Path(tmp) / profile / f"{name}.npy")
+                )
+                drift = abs(result["meshes"][name]["vertices"] - meta["vertices"]) / max(meta["vertices"], 1)
+                ok = chamfer <= args.max_chamfer and drift <= args.max_vertex_drift
+                print(f"  {'ok  ' if ok else 'FAIL'} {name}: chamfer {chamfer:.4f}, 정점 수 변화 {drift:.1%}")
+                failed |= not ok
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())